@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+        ('products', '0007_remove_recommendation_product_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='savedproduct',
+            name='catalog_product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='saves', to='products.product'),
+        ),
+    ]
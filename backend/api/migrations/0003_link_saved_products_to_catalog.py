@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:20
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def link_saved_products(apps, schema_editor):
+    """Add saved products missing from the catalog, then link every saved product to its catalog entry"""
+    Product = apps.get_model('products', 'Product')
+    SavedProduct = apps.get_model('api', 'SavedProduct')
+
+    latest = {}
+    rows = SavedProduct.objects.order_by('saved_at', 'id').values_list(
+        'retailer', 'product_id', 'product_title', 'product_url', 'product_image', 'price'
+    )
+    for retailer, product_id, title, url, image, price in rows.iterator():
+        latest[(retailer, product_id)] = (title, url, image, price)
+
+    Product.objects.bulk_create([
+        Product(retailer=retailer, product_id=product_id, title=title, url=url, image=image, price=price)
+        for (retailer, product_id), (title, url, image, price) in latest.items()
+    ], batch_size=1000, ignore_conflicts=True)
+
+    SavedProduct.objects.update(catalog_product=Subquery(
+        Product.objects.filter(retailer=OuterRef('retailer'), product_id=OuterRef('product_id')).values('id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_savedproduct_catalog_product'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_saved_products, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:10
+
+import json
+import zlib
+
+from django.conf import settings
+from django.db import migrations
+
+
+def seed_taste_vectors(apps, schema_editor):
+    """Start each taste vector from the most recent terms of the profile's cultural preferences, weighted 1.0"""
+    UserProfile = apps.get_model('api', 'UserProfile')
+    TasteVector = apps.get_model('api', 'TasteVector')
+
+    taste_vectors = []
+    for user_id, preferences in UserProfile.objects.values_list('user_id', 'cultural_preferences').iterator():
+        terms = {}
+        for dimension, values in (preferences or {}).items():
+            if not isinstance(values, list):
+                continue
+            normalized = [' '.join(str(value).lower().split()) for value in values]
+            recent = list(dict.fromkeys(term for term in reversed(normalized) if term))
+            if recent:
+                terms[dimension] = {term: 1.0 for term in recent[:settings.TASTE_VECTOR_MAX_TERMS]}
+        if terms:
+            data = zlib.compress(json.dumps(terms, separators=(',', ':')).encode('utf-8'))
+            taste_vectors.append(TasteVector(user_id=user_id, data=data))
+
+    TasteVector.objects.bulk_create(taste_vectors, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_tastevector'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_taste_vectors, migrations.RunPython.noop),
+    ]
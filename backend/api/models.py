@@ -1,8 +1,15 @@
 # api/models.py
+import json
+import zlib
+from typing import Dict, Iterable, List
+
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
 from django.utils import timezone
 
+from products.models import Product
+
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -15,8 +22,75 @@ class UserProfile(models.Model):
         return f"{self.user.username}'s Profile"
 
 
+class TasteVector(models.Model):
+    """
+    A user's learned taste: decayed term weights per cultural dimension, capped to
+    the strongest TASTE_VECTOR_MAX_TERMS terms each and stored as one compressed blob.
+
+    Weights are kept in scaled units (true weight = stored / scale). Decaying
+    every term multiplies nothing; it grows ``scale`` instead, so each update only
+    touches the terms it adds.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='taste_vector')
+    data = models.BinaryField(default=bytes)
+    scale = models.FloatField(default=1.0)
+    updates = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Renormalize before scaled weights lose float precision
+    MAX_SCALE = 1e6
+
+    def __str__(self):
+        return f"{self.user.username}'s Taste Vector"
+
+    @property
+    def terms(self) -> Dict[str, Dict[str, float]]:
+        """Scaled weights by dimension, decoded once per instance"""
+        if not hasattr(self, '_terms'):
+            raw = bytes(self.data)
+            self._terms = json.loads(zlib.decompress(raw)) if raw else {}
+        return self._terms
+
+    def add_signals(self, signals: Dict[str, Iterable[str]], weight: float = 1.0):
+        """Decay existing weights by TASTE_VECTOR_DECAY and add ``weight`` to each signal term"""
+        self.scale /= settings.TASTE_VECTOR_DECAY
+        increment = weight * self.scale
+        max_terms = settings.TASTE_VECTOR_MAX_TERMS
+
+        for dimension, values in signals.items():
+            dimension_terms = self.terms.setdefault(dimension, {})
+            for value in values:
+                term = ' '.join(str(value).lower().split())
+                if term:
+                    dimension_terms[term] = dimension_terms.get(term, 0.0) + increment
+            while len(dimension_terms) > max_terms:
+                del dimension_terms[min(dimension_terms, key=dimension_terms.get)]
+
+        if self.scale > self.MAX_SCALE:
+            for dimension_terms in self.terms.values():
+                for term in dimension_terms:
+                    dimension_terms[term] /= self.scale
+            self.scale = 1.0
+
+        self.updates += 1
+        self.data = zlib.compress(json.dumps(self.terms, separators=(',', ':')).encode('utf-8'))
+
+    def top_terms(self, dimension: str, limit: int) -> List[str]:
+        """The dimension's strongest terms, strongest first"""
+        dimension_terms = self.terms.get(dimension, {})
+        return sorted(dimension_terms, key=dimension_terms.get, reverse=True)[:limit]
+
+    def as_dict(self, limit: int) -> Dict[str, Dict[str, float]]:
+        """Top terms per dimension with their current (decayed) weights"""
+        return {
+            dimension: {term: round(dimension_terms[term] / self.scale, 4) for term in self.top_terms(dimension, limit)}
+            for dimension, dimension_terms in self.terms.items()
+        }
+
+
 class SavedProduct(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    catalog_product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name='saves')
     product_id = models.CharField(max_length=100)
     product_title = models.CharField(max_length=500)
     product_url = models.URLField()
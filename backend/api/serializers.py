@@ -2,7 +2,8 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
-from .models import UserProfile, SavedProduct
+from django.conf import settings
+from .models import UserProfile, SavedProduct, TasteVector
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -48,10 +49,21 @@ class UserLoginSerializer(serializers.Serializer):
 class UserProfileSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     email = serializers.EmailField(source='user.email', read_only=True)
+    # Chat turns stopped writing this blob when the taste vector replaced it; kept editable for existing clients
+    cultural_preferences = serializers.JSONField(
+        required=False,
+        help_text="Deprecated: no longer updated from chat, so it only holds what clients wrote themselves. "
+                  "Read taste_vector for the learned preferences."
+    )
+    taste_vector = serializers.SerializerMethodField(help_text="Strongest learned terms per cultural dimension with decayed weights")
 
     class Meta:
         model = UserProfile
-        fields = ['username', 'email', 'cultural_preferences', 'taste_profile', 'created_at', 'updated_at']
+        fields = ['username', 'email', 'cultural_preferences', 'taste_profile', 'taste_vector', 'created_at', 'updated_at']
+
+    def get_taste_vector(self, profile):
+        taste_vector = TasteVector.objects.filter(user_id=profile.user_id).first()
+        return taste_vector.as_dict(settings.TASTE_VECTOR_PROFILE_TERMS) if taste_vector else {}
 
 
 class SavedProductSerializer(serializers.ModelSerializer):
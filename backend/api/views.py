@@ -11,6 +11,7 @@ from .serializers import (
     UserProfileSerializer,
     SavedProductSerializer
 )
+from products.services import ProductCatalogService
 from .models import UserProfile, SavedProduct
 
 
@@ -63,7 +64,7 @@ def logout_view(request):
 
 
 class UserProfileView(generics.RetrieveUpdateAPIView):
-    """Get and update user profile"""
+    """Get and update user profile (cultural_preferences is deprecated in favour of taste_vector)"""
     serializer_class = UserProfileSerializer
     permission_classes = [IsAuthenticated]
 
@@ -81,7 +82,19 @@ class SavedProductsView(generics.ListCreateAPIView):
         return SavedProduct.objects.filter(user=self.request.user).order_by('-saved_at')
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        data = serializer.validated_data
+        catalog_ids = ProductCatalogService().ensure_products([{
+            'retailer': data['retailer'],
+            'product_id': data['product_id'],
+            'title': data['product_title'],
+            'url': data['product_url'],
+            'image': data.get('product_image'),
+            'price': data.get('price')
+        }])
+        serializer.save(
+            user=self.request.user,
+            catalog_product_id=catalog_ids.get((data['retailer'], data['product_id']))
+        )
 
 
 class SavedProductDetailView(generics.RetrieveDestroyAPIView):
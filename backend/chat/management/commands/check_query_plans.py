@@ -0,0 +1,69 @@
+# chat/management/commands/check_query_plans.py
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from chat.models import Message
+from chat.views import ConversationListView, CulturalPreferenceView, MessageCursorPagination
+from products.views import ProductSearchCursorPagination, ProductSearchHistoryView
+
+
+def _view_queryset(view_class, user):
+    view = view_class()
+    view.request = SimpleNamespace(user=user)
+    return view.get_queryset()
+
+
+def plan_checks(user):
+    """(description, queryset, index the plan must use) for each hot list endpoint"""
+    return [
+        (
+            'conversation list',
+            _view_queryset(ConversationListView, user),
+            'chat_conv_user_active_upd_idx',
+        ),
+        (
+            'conversation history page',
+            Message.objects.filter(conversation_id=0).order_by(*MessageCursorPagination.ordering),
+            'chat_msg_conv_ts_id_idx',
+        ),
+        (
+            'product search history page',
+            _view_queryset(ProductSearchHistoryView, user).order_by(*ProductSearchCursorPagination.ordering),
+            'prod_search_user_ts_id_idx',
+        ),
+        (
+            'cultural preferences',
+            _view_queryset(CulturalPreferenceView, user),
+            'chat_pref_user_created_idx',
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Fail if any hot list endpoint's queryset stops using its composite index (PostgreSQL only)"
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Query plan checks require PostgreSQL")
+
+        failures = []
+        with transaction.atomic():
+            # Small or empty tables make sequential scans look cheapest; rule them out
+            # so the plan shows which index the query shape can use
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for description, queryset, index_name in plan_checks(User(pk=0)):
+                plan = queryset.explain()
+                if index_name in plan:
+                    self.stdout.write(f"ok   {description}: {index_name}")
+                else:
+                    failures.append(description)
+                    self.stdout.write(f"FAIL {description}: expected {index_name}\n{plan}")
+
+        if failures:
+            raise CommandError(f"Missing index usage for: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("All query plans use their indexes"))
@@ -0,0 +1,11 @@
+# chat/management/commands/clear_extraction_cache.py
+from django.core.management.base import BaseCommand
+from chat.services import invalidate_extraction_cache
+
+
+class Command(BaseCommand):
+    help = "Invalidate cached Gemini cultural-signal extractions (run after changing the extraction prompt)"
+
+    def handle(self, *args, **options):
+        invalidate_extraction_cache()
+        self.stdout.write(self.style.SUCCESS("Extraction cache invalidated"))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user', '-updated_at'], name='chat_conv_user_active_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='culturalpreference',
+            index=models.Index(fields=['user', '-created_at'], name='chat_pref_user_created_idx'),
+        ),
+    ]
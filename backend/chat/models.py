@@ -1,6 +1,17 @@
 # chat/models.py
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import Count, Prefetch
+
+
+class ConversationQuerySet(models.QuerySet):
+    def with_message_summary(self):
+        """Annotate message counts and prefetch each conversation's latest message in constant queries"""
+        latest_messages = Message.objects.order_by('-timestamp', '-id')[:1]
+        return self.annotate(message_count=Count('messages')).prefetch_related(
+            Prefetch('messages', queryset=latest_messages, to_attr='latest_messages')
+        )
 
 
 class Conversation(models.Model):
@@ -11,25 +22,43 @@ class Conversation(models.Model):
     is_active = models.BooleanField(default=True)
     cultural_context_summary = models.JSONField(default=dict, blank=True, help_text="Summary of Qloo-driven cultural insights for the conversation")
 
+    objects = ConversationQuerySet.as_manager()
+
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # Conversation lists only ever show active conversations, newest first
+            models.Index(
+                fields=['user', '-updated_at'],
+                condition=models.Q(is_active=True),
+                name='chat_conv_user_active_upd_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.title or 'Conversation'}"
 
-    def update_cultural_context_summary(self, cultural_context: dict):
+    def update_cultural_context_summary(self, cultural_context: dict, save: bool = True) -> bool:
         """
         Update the cultural context summary with Qloo-driven insights.
         Stores aggregated cultural signals without personal data, emphasizing Qloo's privacy-first approach.
+        Each list keeps its CONVERSATION_SUMMARY_MAX_TERMS most recent values; the row is
+        only written when the summary changed. Returns whether it changed.
         """
         existing_summary = self.cultural_context_summary or {}
+        max_terms = settings.CONVERSATION_SUMMARY_MAX_TERMS
+        changed = False
         for key, value in cultural_context.items():
             if isinstance(value, list):
-                if key not in existing_summary:
-                    existing_summary[key] = []
-                existing_summary[key] = list(set(existing_summary[key] + value))
+                current = existing_summary.get(key, [])
+                merged = list(dict.fromkeys(value + current))[:max_terms]
+                if merged != current:
+                    existing_summary[key] = merged
+                    changed = True
         self.cultural_context_summary = existing_summary
-        self.save()
+        if changed and save:
+            self.save(update_fields=['cultural_context_summary', 'updated_at'])
+        return changed
 
 
 class Message(models.Model):
@@ -48,6 +77,9 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            models.Index(fields=['conversation', 'timestamp', 'id'], name='chat_msg_conv_ts_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.conversation} - {self.message_type}: {self.content[:50]}..."
@@ -69,6 +101,7 @@ class CulturalPreference(models.Model):
             models.Index(fields=['preference_type', 'preference_value']),
             models.Index(fields=['qloo_entity_id']),
             models.Index(fields=['qloo_tag_id']),
+            models.Index(fields=['user', '-created_at'], name='chat_pref_user_created_idx'),
         ]
 
     def __str__(self):
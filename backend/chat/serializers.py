@@ -23,6 +23,8 @@ class ConversationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
     def get_message_count(self, obj):
+        if hasattr(obj, 'message_count'):
+            return obj.message_count
         return obj.messages.count()
 
 
@@ -36,11 +38,17 @@ class ConversationListSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'created_at', 'updated_at', 'is_active', 'message_count', 'last_message', 'cultural_context_summary']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+    # Querysets from Conversation.objects.with_message_summary() avoid a query per conversation
     def get_message_count(self, obj):
+        if hasattr(obj, 'message_count'):
+            return obj.message_count
         return obj.messages.count()
 
     def get_last_message(self, obj):
-        last_message = obj.messages.last()
+        if hasattr(obj, 'latest_messages'):
+            last_message = obj.latest_messages[0] if obj.latest_messages else None
+        else:
+            last_message = obj.messages.last()
         if last_message:
             return {
                 'content': last_message.content[:100] + '...' if len(last_message.content) > 100 else last_message.content,
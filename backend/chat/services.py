@@ -1,18 +1,183 @@
 # chat/services.py
-import os
+import hashlib
 import json
 import logging
-import requests
-from typing import Dict, List, Any, Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Callable, Iterator, Optional, Tuple
+from celery.result import AsyncResult
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from fesoni import http_client, ratelimit
+from fesoni.caching import ReadThroughCache, StaleWhileRevalidateCache, TieredCache
+from fesoni.executors import DatabaseThreadPoolExecutor
 from .models import Conversation, Message, CulturalPreference
-from api.models import UserProfile
+from .tasks import discover_products
+from .taxonomy import get_taxonomy
+from api.models import TasteVector
 from products.services import ProductService
 import google.generativeai as genai
 
 logger = logging.getLogger(__name__)
 
+# Cultural-signal extraction results keyed on the normalized message and prompt version
+extraction_cache = TieredCache(
+    'gemini-extraction',
+    ttl=settings.GEMINI_EXTRACTION_CACHE_TTL,
+    l1_maxsize=settings.GEMINI_EXTRACTION_L1_SIZE,
+    l1_ttl=settings.GEMINI_EXTRACTION_L1_TTL
+)
+
+# Entity/tag resolution is shared across users, so cache it process-independently in Redis
+qloo_entity_cache = ReadThroughCache(
+    'qloo-entities',
+    ttl=settings.QLOO_RESOLUTION_CACHE_TTL,
+    negative_ttl=settings.QLOO_RESOLUTION_NEGATIVE_TTL
+)
+qloo_tag_cache = ReadThroughCache(
+    'qloo-tags',
+    ttl=settings.QLOO_RESOLUTION_CACHE_TTL,
+    negative_ttl=settings.QLOO_RESOLUTION_NEGATIVE_TTL
+)
+# Insights are stable for hours, so stale entries are served while a refresh runs
+qloo_insights_cache = StaleWhileRevalidateCache(
+    'qloo-insights',
+    ttl=settings.QLOO_INSIGHTS_CACHE_TTL,
+    stale_ttl=settings.QLOO_INSIGHTS_STALE_TTL
+)
+
+CULTURAL_SIGNAL_SCHEMA = """{
+            "cultural_references": ["list of cultural references like movies, music, books"],
+            "aesthetic_keywords": ["list of aesthetic descriptors"],
+            "style_preferences": ["list of style preferences"],
+            "product_categories": ["list of relevant product categories"],
+            "mood_descriptors": ["list of mood/vibe descriptors"],
+            "confidence_score": 0.0-1.0,
+            "entities_to_search": ["specific entities like movie titles, artist names for Qloo"],
+            "tags_to_search": ["generic tags like 'minimalist', 'cozy' for Qloo"],
+            "target_entity_type": "most relevant entity type for Qloo (movie, artist, book, brand)"
+        }"""
+
+# Bump whenever the extraction prompt wording or the validation of its output changes
+# so cached extractions are not reused
+EXTRACTION_PROMPT_VERSION = "2"
+
+# Entity and tag queries resolved per turn
+QLOO_MAX_SIGNALS = 5
+
+CULTURAL_SIGNAL_LIST_FIELDS = (
+    "cultural_references",
+    "aesthetic_keywords",
+    "style_preferences",
+    "product_categories",
+    "mood_descriptors",
+    "entities_to_search",
+    "tags_to_search",
+)
+
+# Follow-up messages made only of these words refine the previous turn's search instead of
+# starting a new one: a size or color, plus price wording and filler around it. Price wording
+# alone does not change the search, so such messages go through extraction as usual.
+REFINEMENT_ATTRIBUTE_TERMS = {
+    "size": frozenset({
+        "smaller", "small", "bigger", "big", "larger", "large", "medium", "mini", "oversized",
+        "longer", "shorter", "xs", "xl", "xxl",
+    }),
+    "color": frozenset({
+        "black", "white", "grey", "gray", "silver", "gold", "red", "pink", "orange", "yellow",
+        "green", "blue", "navy", "teal", "purple", "brown", "beige", "cream", "tan",
+        "lighter", "darker",
+    }),
+}
+REFINEMENT_PRICE_TERMS = frozenset({
+    "cheaper", "cheap", "cheapest", "affordable", "budget", "inexpensive", "expensive",
+    "pricier", "premium", "luxury", "under", "below", "less", "lower", "price", "priced",
+})
+REFINEMENT_FILLER = frozenset({
+    "a", "an", "the", "in", "on", "with", "and", "or", "but", "any", "some", "something",
+    "one", "ones", "version", "option", "options", "color", "colour", "size", "more", "bit",
+    "little", "slightly", "much", "too", "than", "that", "those", "this", "these", "it",
+    "them", "maybe", "please", "instead", "show", "me", "what", "about", "how", "got",
+    "have", "do", "you", "is", "are", "there", "ok", "okay", "now", "also", "same",
+    "dollars", "usd",
+})
+_CODE_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL | re.IGNORECASE)
+_REFINEMENT_TOKEN_RE = re.compile(r"[a-z]+|\$?\d+(?:\.\d+)?")
+
+def invalidate_extraction_cache():
+    """Drop all cached cultural-signal extractions, e.g. after a prompt template change"""
+    extraction_cache.clear()
+
+def _strip_code_fences(text: str) -> str:
+    """Unwrap a ```json ... ``` block, which Gemini often puts around JSON in plain-text replies"""
+    match = _CODE_FENCE_RE.match(text)
+    return match.group(1) if match else text
+
+def refinement_attributes(message: str) -> Optional[Dict[str, List[str]]]:
+    """
+    The size and color terms of a refinement message ("in blue", "smaller one"), by kind;
+    None when the message names no size or color or says anything beyond refinement vocabulary
+    """
+    attributes: Dict[str, List[str]] = {}
+    for token in _REFINEMENT_TOKEN_RE.findall(message.lower()):
+        kind = next((kind for kind, terms in REFINEMENT_ATTRIBUTE_TERMS.items() if token in terms), None)
+        if kind is not None:
+            attributes.setdefault(kind, [])
+            if token not in attributes[kind]:
+                attributes[kind].append(token)
+        elif token not in REFINEMENT_PRICE_TERMS and token not in REFINEMENT_FILLER and token[0] not in "$0123456789":
+            return None
+    return attributes or None
+
+
+class ConversationSignalCache:
+    """
+    Per-conversation signals carried between turns: the last extracted cultural
+    context with the refinements applied on top of it since, and the Qloo signal
+    state (resolved entity and tag IDs, the last insights and trends) that lets
+    follow-up turns resolve only what is new.
+    """
+    
+    def __init__(self, namespace: str, ttl: int):
+        self.namespace = namespace
+        self.ttl = ttl
+    
+    def get_context(self, conversation_id: int) -> Optional[Tuple[Dict, Dict[str, List[str]]]]:
+        """The last extracted context and the refinements currently applied to it"""
+        stored = self._get(conversation_id, "context")
+        if stored is None:
+            return None
+        return stored["base"], stored["refinements"]
+    
+    def set_context(self, conversation_id: int, cultural_context: Dict, refinements: Optional[Dict[str, List[str]]] = None):
+        self._set(conversation_id, "context", {"base": cultural_context, "refinements": refinements or {}})
+    
+    def get_qloo_state(self, conversation_id: int) -> Dict:
+        return self._get(conversation_id, "qloo") or {}
+    
+    def set_qloo_state(self, conversation_id: int, signal_state: Dict):
+        self._set(conversation_id, "qloo", signal_state)
+    
+    def _get(self, conversation_id: int, kind: str) -> Any:
+        # A cache outage only costs the reuse, so it degrades to a miss
+        try:
+            return cache.get(f"{self.namespace}:{conversation_id}:{kind}")
+        except Exception as e:
+            logger.warning(f"Cache read failed for {self.namespace}: {e}")
+            return None
+    
+    def _set(self, conversation_id: int, kind: str, value: Any):
+        try:
+            cache.set(f"{self.namespace}:{conversation_id}:{kind}", value, self.ttl)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {self.namespace}: {e}")
+
+conversation_signals = ConversationSignalCache('conversation-signals', ttl=settings.CONVERSATION_SIGNAL_CACHE_TTL)
+
 class GeminiService:
+    FALLBACK_RESPONSE = "I'm sorry, I'm having trouble processing your request. Please try again."
+    
     def __init__(self):
         # Configure Gemini API for natural language processing
         genai.configure(api_key=settings.GOOGLE_API_KEY)
@@ -20,44 +185,174 @@ class GeminiService:
     
     def extract_cultural_preferences(self, message: str) -> Dict[str, Any]:
         """Extract cultural signals from user message using Gemini to prepare for Qloo's cultural mapping"""
+        cached = self.get_cached_extraction(message)
+        if cached is not None:
+            return cached
+        
+        cultural_data = self._extract_cultural_preferences(message)
+        if cultural_data is None:
+            return self._empty_cultural_signals()
+        
+        self.cache_extraction(message, cultural_data)
+        return cultural_data
+    
+    def get_cached_extraction(self, message: str) -> Optional[Dict[str, Any]]:
+        """Return a previously extracted result for an equivalent message, if any"""
+        return extraction_cache.get(self._extraction_cache_key(message))
+    
+    def cache_extraction(self, message: str, cultural_data: Dict[str, Any]):
+        extraction_cache.set(self._extraction_cache_key(message), cultural_data)
+    
+    def _extraction_cache_key(self, message: str) -> Tuple[str, str, str]:
+        # Case, punctuation and spacing differences don't change the extracted signals
+        normalized = " ".join(re.sub(r"[^\w\s']", " ", message.lower()).split())
+        schema_digest = hashlib.sha1(CULTURAL_SIGNAL_SCHEMA.encode("utf-8")).hexdigest()
+        return EXTRACTION_PROMPT_VERSION, schema_digest, normalized
+    
+    def _extract_cultural_preferences(self, message: str) -> Optional[Dict[str, Any]]:
+        """Call Gemini for extraction; returns None on failure so errors are not cached"""
         prompt = f"""
         Analyze the following message and extract cultural signals for Qloo's Taste AI™ to map to preferences.
         Return a JSON object with:
-        {{
-            "cultural_references": ["list of cultural references like movies, music, books"],
-            "aesthetic_keywords": ["list of aesthetic descriptors"],
-            "style_preferences": ["list of style preferences"],
-            "product_categories": ["list of relevant product categories"],
-            "mood_descriptors": ["list of mood/vibe descriptors"],
-            "confidence_score": 0.0-1.0,
-            "entities_to_search": ["specific entities like movie titles, artist names for Qloo"],
-            "tags_to_search": ["generic tags like 'minimalist', 'cozy' for Qloo"],
-            "target_entity_type": "most relevant entity type for Qloo (movie, artist, book, brand)"
-        }}
+        {CULTURAL_SIGNAL_SCHEMA}
         
         Message: "{message}"
         """
         
         try:
-            response = self.model.generate_content(prompt)
-            cultural_data = json.loads(response.text)
-            return cultural_data
+            with ratelimit.limit('gemini'):
+                response = self.model.generate_content(prompt)
+            cultural_data = json.loads(_strip_code_fences(response.text))
         except Exception as e:
             logger.error(f"Error extracting cultural signals: {e}")
-            return {
-                "cultural_references": [],
-                "aesthetic_keywords": [],
-                "style_preferences": [],
-                "product_categories": [],
-                "mood_descriptors": [],
-                "confidence_score": 0.0,
-                "entities_to_search": [],
-                "tags_to_search": [],
-                "target_entity_type": "brand"
-            }
+            return None
+        
+        # Validated like the combined path so malformed output is never cached
+        cultural_signals = self._validate_cultural_signals(cultural_data)
+        if cultural_signals is None:
+            logger.error("Cultural signal extraction failed schema validation")
+        return cultural_signals
+    
+    def extract_and_respond(self, message: str, conversation_history: List[Dict]) -> Optional[Tuple[Dict[str, Any], str]]:
+        """
+        Extract cultural signals and write the conversational reply in a single Gemini call.
+        Returns None when the structured output is unusable so callers can fall back to
+        the separate extraction and response calls.
+        """
+        history_context = "\n".join([
+            f"{msg['message_type']}: {msg['content']}" 
+            for msg in conversation_history[-5:]
+        ])
+        
+        prompt = f"""
+        You are TasteMatch, a cultural intelligence shopping platform powered by Qloo's Taste AI™.
+        Qloo maps cultural preferences to product recommendations, enabling personalized shopping without personal data.
+        
+        Recent Conversation:
+        {history_context}
+        
+        Current Message: "{message}"
+        
+        First, extract cultural signals from the current message for Qloo's Taste AI™ to map to preferences.
+        Then respond as a culturally-aware assistant. Acknowledge the user's aesthetic preferences,
+        emphasize how Qloo's cultural intelligence powers recommendations, and ask clarifying questions if needed.
+        If the user is ready to shop, suggest products matched to their vibe via Qloo's insights.
+        
+        Return only a JSON object with:
+        {{
+            "cultural_signals": {CULTURAL_SIGNAL_SCHEMA},
+            "reply": "your conversational response to the user"
+        }}
+        """
+        
+        try:
+            # gemini-pro has no JSON mode, so the object is parsed out of the plain-text reply
+            with ratelimit.limit('gemini'):
+                response = self.model.generate_content(prompt)
+            data = json.loads(_strip_code_fences(response.text))
+        except Exception as e:
+            logger.error(f"Error in combined extraction and response: {e}")
+            return None
+        
+        if not isinstance(data, dict):
+            logger.warning("Combined Gemini output is not a JSON object")
+            return None
+        
+        reply = data.get("reply")
+        cultural_signals = self._validate_cultural_signals(data.get("cultural_signals"))
+        if not isinstance(reply, str) or not reply.strip() or cultural_signals is None:
+            logger.warning("Combined Gemini output failed schema validation")
+            return None
+        
+        return cultural_signals, reply
+    
+    def _validate_cultural_signals(self, data: Any) -> Optional[Dict[str, Any]]:
+        """Coerce extracted signals to the expected schema; None if the shape is wrong"""
+        if not isinstance(data, dict):
+            return None
+        
+        signals = self._empty_cultural_signals()
+        for field in CULTURAL_SIGNAL_LIST_FIELDS:
+            values = data.get(field, [])
+            if not isinstance(values, list):
+                return None
+            signals[field] = [value.strip() for value in values if isinstance(value, str) and value.strip()]
+        
+        try:
+            signals["confidence_score"] = min(max(float(data.get("confidence_score", 0.0)), 0.0), 1.0)
+        except (TypeError, ValueError):
+            return None
+        
+        target_entity_type = data.get("target_entity_type")
+        if isinstance(target_entity_type, str) and target_entity_type.strip():
+            signals["target_entity_type"] = target_entity_type.strip().lower()
+        
+        return signals
+    
+    def _empty_cultural_signals(self) -> Dict[str, Any]:
+        return {
+            "cultural_references": [],
+            "aesthetic_keywords": [],
+            "style_preferences": [],
+            "product_categories": [],
+            "mood_descriptors": [],
+            "confidence_score": 0.0,
+            "entities_to_search": [],
+            "tags_to_search": [],
+            "target_entity_type": "brand"
+        }
     
     def generate_response(self, message: str, conversation_history: List[Dict], cultural_context: Dict) -> str:
         """Generate conversational response using Gemini, guided by Qloo's cultural insights"""
+        prompt = self._build_response_prompt(message, conversation_history, cultural_context)
+        
+        try:
+            with ratelimit.limit('gemini'):
+                response = self.model.generate_content(prompt)
+            return response.text
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            return self.FALLBACK_RESPONSE
+    
+    def generate_response_stream(self, message: str, conversation_history: List[Dict], cultural_context: Dict) -> Iterator[str]:
+        """Stream the conversational response from Gemini chunk by chunk as it is generated"""
+        prompt = self._build_response_prompt(message, conversation_history, cultural_context)
+        
+        streamed_any = False
+        try:
+            # The concurrency slot is held until the stream ends
+            with ratelimit.limit('gemini'):
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    text = chunk.text
+                    if text:
+                        streamed_any = True
+                        yield text
+        except Exception as e:
+            logger.error(f"Error streaming response: {e}")
+            if not streamed_any:
+                yield self.FALLBACK_RESPONSE
+    
+    def _build_response_prompt(self, message: str, conversation_history: List[Dict], cultural_context: Dict) -> str:
         history_context = "\n".join([
             f"{msg['message_type']}: {msg['content']}" 
             for msg in conversation_history[-5:]
@@ -80,18 +375,13 @@ class GeminiService:
         emphasize how Qloo's cultural intelligence powers recommendations, and ask clarifying questions if needed.
         If the user is ready to shop, suggest products matched to their vibe via Qloo's insights.
         """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            logger.error(f"Error generating response: {e}")
-            return "I'm sorry, I'm having trouble processing your request. Please try again."
+        return prompt
 
 class QlooService:
     def __init__(self):
         self.api_key = settings.QLOO_API_KEY
         self.base_url = "https://hackathon.api.qloo.com"
+        self.max_workers = settings.QLOO_MAX_WORKERS
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -99,6 +389,14 @@ class QlooService:
     
     def search_entities(self, query: str, entity_type: Optional[str] = None) -> List[Dict]:
         """Search for cultural entities using Qloo's API to power cross-domain recommendations"""
+        return qloo_entity_cache.get_or_fetch(
+            (query, entity_type),
+            lambda: self._fetch_entities(query, entity_type),
+            default=[]
+        )
+    
+    def _fetch_entities(self, query: str, entity_type: Optional[str] = None) -> Optional[List[Dict]]:
+        """Query Qloo's search endpoint; returns None on failure so errors are not cached"""
         try:
             url = f"{self.base_url}/search"
             params = {
@@ -119,21 +417,29 @@ class QlooService:
                 if entity_type in type_mapping:
                     params["type"] = type_mapping[entity_type]
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = http_client.get(url, endpoint='qloo.search', headers=self.headers, params=params)
             
             if response.status_code == 200:
                 data = response.json()
                 return data.get("results", [])
             else:
                 logger.error(f"Qloo search error: {response.status_code} - {response.text}")
-                return []
+                return None
                 
         except Exception as e:
             logger.error(f"Error searching Qloo entities: {e}")
-            return []
+            return None
     
     def search_tags(self, query: str) -> List[Dict]:
         """Search for cultural tags using Qloo's API to enhance aesthetic mapping"""
+        return qloo_tag_cache.get_or_fetch(
+            (query,),
+            lambda: self._fetch_tags(query),
+            default=[]
+        )
+    
+    def _fetch_tags(self, query: str) -> Optional[List[Dict]]:
+        """Query Qloo's tags endpoint; returns None on failure so errors are not cached"""
         try:
             url = f"{self.base_url}/v2/tags"
             params = {
@@ -141,22 +447,45 @@ class QlooService:
                 "limit": 10
             }
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = http_client.get(url, endpoint='qloo.tags', headers=self.headers, params=params)
             
             if response.status_code == 200:
                 data = response.json()
                 return data.get("results", [])
             else:
                 logger.error(f"Qloo tags search error: {response.status_code} - {response.text}")
-                return []
+                return None
                 
         except Exception as e:
             logger.error(f"Error searching Qloo tags: {e}")
-            return []
+            return None
     
     def get_cultural_insights(self, signal_entities: List[str] = None, signal_tags: List[str] = None, 
                              additional_filters: Dict = None) -> Dict[str, Any]:
         """Get cultural insights using Qloo's Taste AI™ for personalized recommendations"""
+        # Canonicalize the signal set so reordered or repeated IDs share a cache entry
+        signal_entities = sorted({str(entity_id) for entity_id in signal_entities or [] if entity_id})
+        signal_tags = sorted({str(tag_id) for tag_id in signal_tags or [] if tag_id})
+        filters_key = json.dumps(additional_filters or {}, sort_keys=True, default=str)
+        
+        failure = {}
+        
+        def fetch():
+            result = self._fetch_cultural_insights(signal_entities, signal_tags, additional_filters)
+            if result.get("success"):
+                return result
+            failure.update(result)
+            return None
+        
+        result = qloo_insights_cache.get_or_fetch(
+            (",".join(signal_entities), ",".join(signal_tags), filters_key),
+            fetch
+        )
+        return result if result is not None else failure
+    
+    def _fetch_cultural_insights(self, signal_entities: List[str] = None, signal_tags: List[str] = None,
+                                 additional_filters: Dict = None) -> Dict[str, Any]:
+        """Call Qloo's insights endpoint directly, bypassing the cache"""
         try:
             url = f"{self.base_url}/v2/insights"
             
@@ -174,7 +503,7 @@ class QlooService:
             if additional_filters:
                 params.update(additional_filters)
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = http_client.get(url, endpoint='qloo.insights', headers=self.headers, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -201,7 +530,7 @@ class QlooService:
             if tags:
                 params["tags"] = ",".join(tags)
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = http_client.get(url, endpoint='qloo.trends', headers=self.headers, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -218,38 +547,83 @@ class QlooService:
             logger.error(f"Error getting cultural trends: {e}")
             return {"success": False, "error": str(e)}
     
-    def map_cultural_to_products(self, cultural_preferences: Dict) -> Dict[str, Any]:
-        """Map cultural preferences to product categories and brands using Qloo's Taste AI™ as the core intelligence engine"""
+    def map_cultural_to_products(self, cultural_preferences: Dict, signal_state: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        Map cultural preferences to product categories and brands using Qloo's Taste AI™ as the core intelligence engine.
+        
+        ``signal_state`` carries resolutions from earlier turns of a conversation
+        (see ConversationSignalCache): only entity and tag queries it has not seen
+        are resolved, and insights and trends are reused while their inputs are
+        unchanged. It is updated in place with this turn's results.
+        """
         try:
-            entities_to_search = cultural_preferences.get("entities_to_search", [])
-            tags_to_search = cultural_preferences.get("tags_to_search", [])
+            entities_to_search = cultural_preferences.get("entities_to_search", [])[:QLOO_MAX_SIGNALS]
+            trend_tags = cultural_preferences.get("tags_to_search", [])
+            tags_to_search = trend_tags[:QLOO_MAX_SIGNALS]
             target_entity_type = cultural_preferences.get("target_entity_type", "brand")
             
-            signal_entity_ids = []
-            for entity_query in entities_to_search[:5]:
-                entities = self.search_entities(entity_query, target_entity_type)
-                if entities:
-                    signal_entity_ids.append(entities[0].get("id"))
-            
-            signal_tag_ids = []
-            for tag_query in tags_to_search[:5]:
-                tags = self.search_tags(tag_query)
-                if tags:
-                    signal_tag_ids.append(tags[0].get("id"))
-            
-            cultural_insights = []
-            if signal_entity_ids or signal_tag_ids:
-                insights_result = self.get_cultural_insights(
-                    signal_entities=signal_entity_ids,
-                    signal_tags=signal_tag_ids
-                )
-                
-                if insights_result.get("success"):
-                    cultural_insights = insights_result.get("cultural_insights", [])
+            state = signal_state if signal_state is not None else {}
+            resolved_entities = state.setdefault("entities", {})
+            resolved_tags = state.setdefault("tags", {})
+            entity_keys = [f"{target_entity_type}:{query}" for query in entities_to_search]
             
-            # Fetch cultural trends for discovery
-            trend_data = self.get_cultural_trends(tags=tags_to_search)
-            trends = trend_data.get("trends", []) if trend_data.get("success") else []
+            # Resolve new entities and tags concurrently; trends only depend on the raw tag
+            # queries, so they run alongside resolution and the insights call
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                trends_future = None
+                if state.get("trends", {}).get("key") != trend_tags:
+                    trends_future = executor.submit(self.get_cultural_trends, tags=trend_tags)
+                entity_futures = {
+                    key: executor.submit(self.search_entities, entity_query, target_entity_type)
+                    for key, entity_query in zip(entity_keys, entities_to_search)
+                    if key not in resolved_entities
+                }
+                tag_futures = {
+                    tag_query: executor.submit(self.search_tags, tag_query)
+                    for tag_query in tags_to_search
+                    if tag_query not in resolved_tags
+                }
+                
+                # Only hits are kept, so unresolved queries are retried (via the shared cache) next turn
+                for key, future in entity_futures.items():
+                    entities = future.result()
+                    if entities:
+                        resolved_entities[key] = entities[0].get("id")
+                signal_entity_ids = [resolved_entities[key] for key in entity_keys if resolved_entities.get(key)]
+                
+                for tag_query, future in tag_futures.items():
+                    tags = future.result()
+                    if tags:
+                        resolved_tags[tag_query] = tags[0].get("id")
+                signal_tag_ids = [resolved_tags[query] for query in tags_to_search if resolved_tags.get(query)]
+                
+                insights_key = [sorted(signal_entity_ids), sorted(signal_tag_ids)]
+                if state.get("insights", {}).get("key") == insights_key:
+                    cultural_insights = state["insights"]["value"]
+                else:
+                    cultural_insights = []
+                    if signal_entity_ids or signal_tag_ids:
+                        insights_result = self.get_cultural_insights(
+                            signal_entities=signal_entity_ids,
+                            signal_tags=signal_tag_ids
+                        )
+                        
+                        # Failed calls are left out of the state so the next turn retries them
+                        if insights_result.get("success"):
+                            cultural_insights = insights_result.get("cultural_insights", [])
+                            state["insights"] = {"key": insights_key, "value": cultural_insights}
+                    else:
+                        state["insights"] = {"key": insights_key, "value": cultural_insights}
+                
+                # Fetch cultural trends for discovery
+                if trends_future is None:
+                    trends = state["trends"]["value"]
+                else:
+                    trend_data = trends_future.result()
+                    trends = []
+                    if trend_data.get("success"):
+                        trends = trend_data.get("trends", [])
+                        state["trends"] = {"key": trend_tags, "value": trends}
             
             product_categories = self._map_to_product_categories(cultural_preferences, cultural_insights)
             
@@ -279,62 +653,17 @@ class QlooService:
     
     def _map_to_product_categories(self, cultural_preferences: Dict, cultural_insights: List[Dict]) -> List[str]:
         """Map cultural preferences and Qloo insights to product categories for cross-domain recommendations"""
-        categories = set()
-        
-        categories.update(cultural_preferences.get("product_categories", []))
-        
-        aesthetic_keywords = cultural_preferences.get("aesthetic_keywords", [])
-        style_preferences = cultural_preferences.get("style_preferences", [])
-        
-        keyword_category_mapping = {
-            # Home & Decor
-            "minimalist": ["Home & Garden", "Furniture", "Decor"],
-            "cozy": ["Home & Garden", "Bedding", "Lighting"],
-            "vintage": ["Home & Garden", "Antiques", "Decor"],
-            "modern": ["Furniture", "Electronics", "Home & Garden"],
-            "rustic": ["Home & Garden", "Furniture", "Outdoor"],
-            "scandinavian": ["Furniture", "Home & Garden", "Lighting"],
-            "bohemian": ["Home & Garden", "Textiles", "Decor"],
-            "industrial": ["Furniture", "Lighting", "Home & Garden"],
-            # Fashion
-            "aesthetic": ["Clothing", "Accessories", "Beauty"],
-            "grunge": ["Clothing", "Accessories", "Music"],
-            "preppy": ["Clothing", "Accessories", "Jewelry"],
-            "streetwear": ["Clothing", "Shoes", "Accessories"],
-            "elegant": ["Clothing", "Jewelry", "Beauty"],
-            "casual": ["Clothing", "Shoes", "Accessories"],
-            # Lifestyle
-            "wellness": ["Health & Beauty", "Books", "Sports"],
-            "outdoorsy": ["Sports & Outdoors", "Clothing", "Equipment"],
-            "tech": ["Electronics", "Gadgets", "Books"],
-            "artistic": ["Art Supplies", "Books", "Home & Garden"],
-            "musical": ["Musical Instruments", "Electronics", "Books"],
-            # Food & Kitchen
-            "mediterranean": ["Kitchen & Dining", "Cookware", "Home & Garden"],
-            "japanese": ["Kitchen & Dining", "Home & Garden", "Decor"],
-            "korean": ["Beauty", "Kitchen & Dining", "Books"]
-        }
+        # Keyword and insight mappings come from the data-driven taxonomy, most heavily weighted first
+        weighted_categories = get_taxonomy().categorize(
+            cultural_preferences.get("aesthetic_keywords", []) + cultural_preferences.get("style_preferences", []),
+            [insight.get("name", "") for insight in cultural_insights[:10]],
+            explicit_categories=cultural_preferences.get("product_categories", [])
+        )
         
-        for keyword in aesthetic_keywords + style_preferences:
-            keyword_lower = keyword.lower()
-            for key, cats in keyword_category_mapping.items():
-                if key in keyword_lower:
-                    categories.update(cats)
-        
-        for insight in cultural_insights[:10]:
-            insight_name = insight.get("name", "").lower()
-            if any(term in insight_name for term in ["fashion", "clothing", "apparel"]):
-                categories.update(["Clothing", "Fashion", "Accessories"])
-            elif any(term in insight_name for term in ["home", "furniture", "decor"]):
-                categories.update(["Home & Garden", "Furniture", "Decor"])
-            elif any(term in insight_name for term in ["beauty", "cosmetics", "skincare"]):
-                categories.update(["Beauty", "Health & Personal Care"])
-            elif any(term in insight_name for term in ["tech", "electronics", "digital"]):
-                categories.update(["Electronics", "Technology", "Gadgets"])
-            elif any(term in insight_name for term in ["food", "kitchen", "cookware"]):
-                categories.update(["Kitchen & Dining", "Cookware"])
-        
-        return list(categories)
+        return list(weighted_categories)
+
+# Streaming turns run product discovery beside token generation
+_stream_discovery_executor = DatabaseThreadPoolExecutor(max_workers=8, thread_name_prefix='stream-discovery')
 
 class ChatService:
     def __init__(self):
@@ -345,32 +674,43 @@ class ChatService:
     def process_message(self, user, message: str, conversation_id: Optional[int] = None, voice_input: bool = False) -> Dict[str, Any]:
         """Process user message, leveraging Qloo's Taste AI™ as the core cultural intelligence engine"""
         try:
-            if conversation_id:
-                conversation = Conversation.objects.get(id=conversation_id, user=user)
-            else:
-                conversation = Conversation.objects.create(
-                    user=user,
-                    title=message[:50] + "..." if len(message) > 50 else message
-                )
-            
-            user_message = Message.objects.create(
-                conversation=conversation,
-                message_type='user',
-                content=message
-            )
-            
-            # Extract cultural signals for Qloo processing
-            cultural_context = self.gemini_service.extract_cultural_preferences(message)
-            
-            self._update_user_cultural_preferences(user, cultural_context, user_message)
+            conversation, user_message = self._start_turn(user, message, conversation_id)
             
             conversation_history = list(conversation.messages.values(
                 'message_type', 'content', 'timestamp'
             ))
             
-            ai_response = self.gemini_service.generate_response(
-                message, conversation_history, cultural_context
-            )
+            # A refinement of the previous turn or a cached extraction leaves only the reply to generate
+            refinement = self._refine_previous_context(conversation, message) if conversation_id else None
+            if refinement is not None:
+                cultural_context, taste_signals = refinement
+            else:
+                cultural_context = self.gemini_service.get_cached_extraction(message)
+            
+            combined = None
+            if settings.GEMINI_SINGLE_CALL_TURN and cultural_context is None:
+                combined = self.gemini_service.extract_and_respond(message, conversation_history)
+            
+            if combined is not None:
+                cultural_context, ai_response = combined
+                self.gemini_service.cache_extraction(message, cultural_context)
+            elif cultural_context is not None:
+                ai_response = self.gemini_service.generate_response(
+                    message, conversation_history, cultural_context
+                )
+            else:
+                # Extract cultural signals for Qloo processing
+                cultural_context = self.gemini_service.extract_cultural_preferences(message)
+                
+                ai_response = self.gemini_service.generate_response(
+                    message, conversation_history, cultural_context
+                )
+            
+            if refinement is None:
+                taste_signals = cultural_context
+                conversation_signals.set_context(conversation.id, cultural_context)
+            taste_vector = self._update_user_cultural_preferences(user, taste_signals, user_message)
+            summary_changed = conversation.update_cultural_context_summary(cultural_context, save=False)
             
             ai_message = Message.objects.create(
                 conversation=conversation,
@@ -379,21 +719,22 @@ class ChatService:
                 cultural_context=cultural_context
             )
             
-            should_search_products = self._should_search_products(message, cultural_context)
+            should_search_products = refinement is not None or self._should_search_products(message, cultural_context)
             
             products = []
             qloo_data = {}
+            product_job = None
             
             if should_search_products:
-                # Use Qloo's Taste AI™ as the primary engine for cultural-to-product mapping
-                qloo_mapping = self.qloo_service.map_cultural_to_products(cultural_context)
-                qloo_data = qloo_mapping
+                discovery_context = self._seed_from_taste_vector(cultural_context, taste_vector)
+                product_job = self._enqueue_product_discovery(user, message, discovery_context, conversation.id)
                 
-                products = self.product_service.search_products(
-                    cultural_context, qloo_mapping
-                )
+                if product_job is None:
+                    qloo_data, products = self._discover_products(discovery_context, conversation.id)
+                    self._record_served_products(user, message, discovery_context, qloo_data, products)
             
-            conversation.save()
+            # The summary JSON is only rewritten when this turn changed it
+            conversation.save(update_fields=['cultural_context_summary', 'updated_at'] if summary_changed else ['updated_at'])
             
             return {
                 'success': True,
@@ -402,7 +743,10 @@ class ChatService:
                 'cultural_context': cultural_context,
                 'qloo_data': qloo_data,
                 'products': products,
-                'voice_input': voice_input
+                'product_job': product_job,
+                'voice_input': voice_input,
+                # Providers shedding load: empty or thin results are a capacity issue, not a miss
+                'degraded_services': ratelimit.degraded_providers()
             }
             
         except Exception as e:
@@ -412,39 +756,241 @@ class ChatService:
                 'error': str(e)
             }
     
-    def _update_user_cultural_preferences(self, user, cultural_context: Dict, message: Message):
+    def stream_message(self, user, message: str, conversation_id: Optional[int] = None,
+                       voice_input: bool = False) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Process a chat turn as a stream of (event, data) pairs: the conversation and
+        cultural context first, then response tokens as Gemini produces them, then
+        the Qloo-driven products once discovery (started alongside generation) finishes.
+        """
+        try:
+            conversation, user_message = self._start_turn(user, message, conversation_id)
+            yield 'conversation', {'conversation_id': conversation.id, 'voice_input': voice_input}
+            
+            refinement = self._refine_previous_context(conversation, message) if conversation_id else None
+            if refinement is not None:
+                cultural_context, taste_signals = refinement
+            else:
+                cultural_context = taste_signals = self.gemini_service.extract_cultural_preferences(message)
+                conversation_signals.set_context(conversation.id, cultural_context)
+            taste_vector = self._update_user_cultural_preferences(user, taste_signals, user_message)
+            yield 'cultural_context', {'cultural_context': cultural_context}
+            
+            # Product discovery only needs the cultural context, so it overlaps token streaming
+            discovery = None
+            discovery_context = cultural_context
+            if refinement is not None or self._should_search_products(message, cultural_context):
+                discovery_context = self._seed_from_taste_vector(cultural_context, taste_vector)
+                discovery = _stream_discovery_executor.submit(
+                    self._discover_products, discovery_context, conversation.id
+                )
+            
+            conversation_history = list(conversation.messages.values(
+                'message_type', 'content', 'timestamp'
+            ))
+            
+            chunks = []
+            for text in self.gemini_service.generate_response_stream(message, conversation_history, cultural_context):
+                chunks.append(text)
+                yield 'token', {'text': text}
+            
+            ai_message = Message.objects.create(
+                conversation=conversation,
+                message_type='assistant',
+                content="".join(chunks),
+                cultural_context=cultural_context
+            )
+            summary_changed = conversation.update_cultural_context_summary(cultural_context, save=False)
+            # Always bump updated_at so the conversation list order follows streamed turns too
+            conversation.save(update_fields=['cultural_context_summary', 'updated_at'] if summary_changed else ['updated_at'])
+            yield 'message', {'message_id': ai_message.id}
+            
+            if discovery is not None:
+                try:
+                    qloo_data, products = discovery.result()
+                except Exception as e:
+                    logger.error(f"Error discovering products for stream: {e}")
+                    qloo_data, products = {}, []
+                self._record_served_products(user, message, discovery_context, qloo_data, products)
+                yield 'products', {'qloo_data': qloo_data, 'products': products}
+            
+            yield 'done', {'success': True, 'degraded_services': ratelimit.degraded_providers()}
+            
+        except Exception as e:
+            logger.error(f"Error streaming message: {e}")
+            yield 'error', {'success': False, 'error': str(e)}
+    
+    def _start_turn(self, user, message: str, conversation_id: Optional[int] = None) -> Tuple[Conversation, Message]:
+        """Load or create the conversation and record the user's message"""
+        if conversation_id:
+            conversation = Conversation.objects.get(id=conversation_id, user=user)
+        else:
+            conversation = Conversation.objects.create(
+                user=user,
+                title=message[:50] + "..." if len(message) > 50 else message
+            )
+        
+        user_message = Message.objects.create(
+            conversation=conversation,
+            message_type='user',
+            content=message
+        )
+        return conversation, user_message
+    
+    def _refine_previous_context(self, conversation: Conversation, message: str) -> Optional[Tuple[Dict, Dict]]:
+        """
+        For a refinement turn ("in blue", "smaller"), the last extracted cultural context with
+        the refinements applied, and the message's size and color terms alone as the turn's
+        new taste signals; None when the message needs a fresh extraction.
+        
+        A size or color replaces the one from an earlier refinement rather than adding to it,
+        so "in blue" then "in red" searches for red only.
+        """
+        attributes = refinement_attributes(message)
+        if attributes is None:
+            return None
+        
+        previous = conversation_signals.get_context(conversation.id)
+        if previous is None:
+            # Refined turns are marked with their refinements, so this finds the last extraction
+            base = conversation.messages.filter(message_type='assistant').exclude(
+                cultural_context={}
+            ).exclude(cultural_context__has_key='refinements').order_by(
+                '-timestamp', '-id'
+            ).values_list('cultural_context', flat=True).first()
+            previous = (base, {}) if base else None
+        if previous is None:
+            return None
+        
+        base, refinements = previous
+        refinements = {**refinements, **attributes}
+        terms = [term for values in refinements.values() for term in values]
+        
+        refined = dict(base)
+        refined["aesthetic_keywords"] = list(dict.fromkeys(terms + base.get("aesthetic_keywords", [])))
+        refined["refinements"] = refinements
+        conversation_signals.set_context(conversation.id, base, refinements)
+        
+        new_terms = [term for values in attributes.values() for term in values]
+        taste_signals = {"confidence_score": base.get("confidence_score", 0.5), "aesthetic_keywords": new_terms}
+        return refined, taste_signals
+    
+    def _discover_products(self, cultural_context: Dict, conversation_id: Optional[int] = None) -> Tuple[Dict[str, Any], List[Dict]]:
+        """Map cultural context through Qloo and search matching products inline"""
+        # Use Qloo's Taste AI™ as the primary engine for cultural-to-product mapping; signals
+        # the conversation already resolved are reused
+        signal_state = conversation_signals.get_qloo_state(conversation_id) if conversation_id else {}
+        qloo_mapping = self.qloo_service.map_cultural_to_products(cultural_context, signal_state)
+        if conversation_id and qloo_mapping.get("success"):
+            conversation_signals.set_qloo_state(conversation_id, signal_state)
+        products = self.product_service.search_products(cultural_context, qloo_mapping)
+        return qloo_mapping, products
+    
+    def _record_served_products(self, user, message: str, cultural_context: Dict, qloo_data: Dict, products: List[Dict]):
+        """Record the products shown for a chat turn alongside regular product searches"""
+        if not products:
+            return
+        try:
+            self.product_service.record_search(user.id, message, cultural_context, qloo_data, products)
+        except Exception as e:
+            logger.error(f"Error recording chat product search: {e}")
+    
+    def _enqueue_product_discovery(self, user, message: str, cultural_context: Dict,
+                                   conversation_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Hand Qloo mapping and product search to Celery; returns None to search inline"""
+        if not settings.CHAT_ASYNC_PRODUCT_SEARCH:
+            return None
+        
+        try:
+            job = discover_products.delay(user.id, cultural_context, message, conversation_id)
+            return {'id': job.id, 'status': 'pending'}
+        except Exception as e:
+            logger.error(f"Error enqueueing product discovery, searching inline: {e}")
+            return None
+    
+    def get_product_job(self, user, job_id: str) -> Dict[str, Any]:
+        """Report the state of a product discovery job started by process_message"""
+        job = AsyncResult(job_id)
+        
+        if job.successful():
+            result = job.result or {}
+            if result.get('user_id') != user.id:
+                return {
+                    'success': False,
+                    'error': 'Product job not found'
+                }
+            return {
+                'success': True,
+                'status': 'ready',
+                'qloo_data': result.get('qloo_data', {}),
+                'products': result.get('products', []),
+                'degraded_services': result.get('degraded_services', [])
+            }
+        
+        if job.failed():
+            logger.error(f"Product discovery job {job_id} failed: {job.result}")
+            return {
+                'success': True,
+                'status': 'failed',
+                'products': [],
+                'degraded_services': ratelimit.degraded_providers()
+            }
+        
+        return {
+            'success': True,
+            'status': 'pending'
+        }
+    
+    def _update_user_cultural_preferences(self, user, cultural_context: Dict, message: Message) -> Optional[TasteVector]:
         """Update user's cultural preferences without storing personal data, powered by Qloo"""
         try:
-            profile, created = UserProfile.objects.get_or_create(user=user)
-            
-            existing_prefs = profile.cultural_preferences or {}
-            
-            for key, values in cultural_context.items():
-                if isinstance(values, list) and values:
-                    if key not in existing_prefs:
-                        existing_prefs[key] = []
-                    for value in values:
-                        if value not in existing_prefs[key]:
-                            existing_prefs[key].append(value)
-            
-            profile.cultural_preferences = existing_prefs
-            profile.save()
-            
-            for pref_type, values in cultural_context.items():
-                if isinstance(values, list):
-                    for value in values:
-                        CulturalPreference.objects.get_or_create(
-                            user=user,
-                            preference_type=pref_type,
-                            preference_value=value,
-                            defaults={
-                                'confidence_score': cultural_context.get('confidence_score', 0.5),
-                                'extracted_from_message': message
-                            }
-                        )
+            extracted = {
+                key: list(dict.fromkeys(str(value) for value in values))
+                for key, values in cultural_context.items()
+                if isinstance(values, list) and values
+            }
+            confidence_score = cultural_context.get('confidence_score', 0.5)
+            
+            with transaction.atomic():
+                # The taste vector absorbs this turn's signals in place of an ever-growing JSON blob
+                taste_vector, _ = TasteVector.objects.select_for_update().get_or_create(user=user)
+                if extracted:
+                    taste_vector.add_signals(extracted, weight=confidence_score)
+                    taste_vector.save()
+                
+                # Existing (user, type, value) rows are left untouched, matching get_or_create
+                CulturalPreference.objects.bulk_create([
+                    CulturalPreference(
+                        user=user,
+                        preference_type=pref_type,
+                        preference_value=value[:200],
+                        confidence_score=confidence_score,
+                        extracted_from_message=message
+                    )
+                    for pref_type, values in extracted.items()
+                    for value in values
+                ], ignore_conflicts=True)
+            
+            return taste_vector
                         
         except Exception as e:
             logger.error(f"Error updating cultural preferences: {e}")
+            return None
+    
+    def _seed_from_taste_vector(self, cultural_context: Dict, taste_vector: Optional[TasteVector]) -> Dict:
+        """Fill spare Qloo entity and tag slots with the user's strongest learned terms"""
+        if taste_vector is None or settings.TASTE_SEED_TERMS <= 0:
+            return cultural_context
+        
+        seeded = dict(cultural_context)
+        for field in ("entities_to_search", "tags_to_search"):
+            current = list(cultural_context.get(field, []))
+            known = {str(value).lower() for value in current}
+            spare_slots = min(settings.TASTE_SEED_TERMS, QLOO_MAX_SIGNALS - len(current))
+            if spare_slots > 0:
+                learned = [term for term in taste_vector.top_terms(field, QLOO_MAX_SIGNALS) if term not in known]
+                seeded[field] = current + learned[:spare_slots]
+        return seeded
     
     def _should_search_products(self, message: str, cultural_context: Dict) -> bool:
         """Determine if product search is needed based on message and Qloo's cultural context"""
@@ -465,11 +1011,13 @@ class ChatService:
         
         return False
     
-    def get_conversation_history(self, user, conversation_id: int) -> Dict[str, Any]:
-        """Retrieve conversation history with Qloo-powered cultural context"""
+    def get_conversation_history(self, user, conversation_id: int, paginate: Optional[Callable] = None) -> Dict[str, Any]:
+        """Retrieve conversation history with Qloo-powered cultural context; ``paginate`` selects a page of messages"""
         try:
             conversation = Conversation.objects.get(id=conversation_id, user=user)
             messages = conversation.messages.all()
+            if paginate is not None:
+                messages = paginate(messages)
             
             return {
                 'success': True,
@@ -497,7 +1045,7 @@ class ChatService:
     
     def get_user_conversations(self, user) -> List[Dict[str, Any]]:
         """Get list of user conversations with Qloo-driven insights"""
-        conversations = Conversation.objects.filter(user=user, is_active=True)
+        conversations = Conversation.objects.filter(user=user, is_active=True).with_message_summary()
         
         return [
             {
@@ -505,8 +1053,8 @@ class ChatService:
                 'title': conv.title,
                 'created_at': conv.created_at,
                 'updated_at': conv.updated_at,
-                'message_count': conv.messages.count(),
-                'last_message': conv.messages.last().content[:100] if conv.messages.exists() else None
+                'message_count': conv.message_count,
+                'last_message': conv.latest_messages[0].content[:100] if conv.latest_messages else None
             }
             for conv in conversations
         ]
\ No newline at end of file
@@ -0,0 +1,46 @@
+# chat/tasks.py
+import logging
+from celery import shared_task
+from django.conf import settings
+from fesoni import ratelimit
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(soft_time_limit=60, time_limit=90)
+def discover_products(user_id: int, cultural_context: dict, search_query: str = '',
+                      conversation_id: int = None) -> dict:
+    """Run Qloo cultural mapping and the Amazon product search outside the request cycle"""
+    # Imported here because chat.services enqueues this task
+    from .services import QlooService, conversation_signals
+    from products.services import ProductService
+
+    product_service = ProductService()
+    # Signals resolved on earlier turns of the conversation are reused, only new ones hit Qloo
+    signal_state = conversation_signals.get_qloo_state(conversation_id) if conversation_id else {}
+    qloo_mapping = QlooService().map_cultural_to_products(cultural_context, signal_state)
+    if conversation_id and qloo_mapping.get('success'):
+        conversation_signals.set_qloo_state(conversation_id, signal_state)
+    products = product_service.search_products(cultural_context, qloo_mapping)
+
+    if products and settings.PRODUCT_ENRICH_TOP_K > 0:
+        products = product_service.enrich_products(
+            products,
+            cultural_context,
+            qloo_mapping,
+            settings.PRODUCT_ENRICH_TOP_K,
+            latency_budget=settings.PRODUCT_ENRICH_LATENCY_BUDGET
+        )
+
+    if products:
+        try:
+            product_service.record_search(user_id, search_query, cultural_context, qloo_mapping, products)
+        except Exception as e:
+            logger.error(f"Error recording chat product search: {e}")
+
+    return {
+        'user_id': user_id,
+        'qloo_data': qloo_mapping,
+        'products': products,
+        'degraded_services': ratelimit.degraded_providers()
+    }
@@ -0,0 +1,135 @@
+# chat/taxonomy.py
+"""
+Category taxonomy mapping cultural keywords and Qloo insight names to product categories.
+
+The taxonomy lives in a JSON file (CATEGORY_TAXONOMY_PATH):
+
+    {
+      "keywords": {"cozy": ["Home & Garden", "Bedding"], "tech": {"Electronics": 1.0, "Books": 0.5}},
+      "insight_rules": [{"terms": ["home", "decor"], "categories": ["Home & Garden"]}]
+    }
+
+A keyword entry applies when its key occurs in a user keyword; an insight rule
+applies when any of its terms occurs in an insight name, and only the first
+matching rule counts for each insight. Categories given as a list weigh 1.0.
+The file is compiled into single-scan matchers and recompiled when it changes.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+from products.scoring import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+Weights = Dict[str, float]
+
+
+class CategoryTaxonomy:
+    """A compiled taxonomy; immutable once built, so it is shared across threads"""
+
+    def __init__(self, keyword_categories: Dict[str, Weights], insight_rules: List[Tuple[List[str], Weights]]):
+        self._keyword_categories = keyword_categories
+        self._keyword_matcher = KeywordMatcher(keyword_categories)
+
+        self._rule_categories = [categories for _, categories in insight_rules]
+        # Each term resolves to the first rule listing it, so the earliest matching rule wins
+        self._term_rules: Dict[str, int] = {}
+        for index, (terms, _) in enumerate(insight_rules):
+            for term in terms:
+                self._term_rules.setdefault(term, index)
+        self._term_matcher = KeywordMatcher(self._term_rules)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'CategoryTaxonomy':
+        keyword_categories = {
+            key.lower(): _weights(categories)
+            for key, categories in data.get('keywords', {}).items()
+        }
+        insight_rules = [
+            ([term.lower() for term in rule.get('terms', [])], _weights(rule.get('categories', [])))
+            for rule in data.get('insight_rules', [])
+        ]
+        return cls(keyword_categories, insight_rules)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'CategoryTaxonomy':
+        with open(path, encoding='utf-8') as taxonomy_file:
+            return cls.from_dict(json.load(taxonomy_file))
+
+    def categorize(self, keywords: Iterable[str], insight_names: Iterable[str],
+                   explicit_categories: Iterable[str] = ()) -> Weights:
+        """Summed category weights, highest first; explicit categories weigh 1.0 each"""
+        weights: Weights = {}
+
+        for category in explicit_categories:
+            _add(weights, {category: 1.0})
+
+        for keyword in keywords:
+            for key in self._keyword_matcher.find(keyword.lower()):
+                _add(weights, self._keyword_categories[key])
+
+        for name in insight_names:
+            hits = self._term_matcher.find(name.lower())
+            if hits:
+                _add(weights, self._rule_categories[min(self._term_rules[term] for term in hits)])
+
+        return dict(sorted(weights.items(), key=lambda item: item[1], reverse=True))
+
+
+class _TaxonomyLoader:
+    """Serves the compiled taxonomy, recompiling it when the file's mtime changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._taxonomy: Optional[CategoryTaxonomy] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+
+    def get(self) -> CategoryTaxonomy:
+        now = time.monotonic()
+        if self._taxonomy is not None and now - self._checked_at < settings.CATEGORY_TAXONOMY_RELOAD_INTERVAL:
+            return self._taxonomy
+
+        with self._lock:
+            if self._taxonomy is None or now - self._checked_at >= settings.CATEGORY_TAXONOMY_RELOAD_INTERVAL:
+                self._reload_if_changed()
+                self._checked_at = now
+        return self._taxonomy
+
+    def _reload_if_changed(self):
+        path = settings.CATEGORY_TAXONOMY_PATH
+        try:
+            mtime = os.stat(path).st_mtime
+            if mtime != self._mtime:
+                self._taxonomy = CategoryTaxonomy.from_file(path)
+                self._mtime = mtime
+                logger.info(f"Loaded category taxonomy from {path}")
+        except Exception as e:
+            # Keep serving the last good taxonomy while the file is broken
+            logger.error(f"Error loading category taxonomy from {path}: {e}")
+            if self._taxonomy is None:
+                self._taxonomy = CategoryTaxonomy({}, [])
+
+
+_loader = _TaxonomyLoader()
+
+
+def get_taxonomy() -> CategoryTaxonomy:
+    return _loader.get()
+
+
+def _weights(categories) -> Weights:
+    if isinstance(categories, dict):
+        return {category: float(weight) for category, weight in categories.items()}
+    return {category: 1.0 for category in categories}
+
+
+def _add(weights: Weights, categories: Weights):
+    for category, weight in categories.items():
+        weights[category] = weights.get(category, 0.0) + weight
@@ -0,0 +1,147 @@
+# chat/tests.py
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chat.management.commands.check_query_plans import plan_checks
+from chat.models import Conversation, Message
+from chat.services import GeminiService, QlooService, refinement_attributes
+
+
+@skipUnless(connection.vendor == 'postgresql', "Query plans are only checked on PostgreSQL")
+class QueryPlanTests(TestCase):
+    """The hot list endpoints keep using the composite indexes added for them"""
+
+    def setUp(self):
+        # Empty test tables make sequential scans look cheapest; rule them out so the
+        # plan shows which index the query shape can use (reset when the test's transaction ends)
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        self.user = User.objects.create_user(username='plans')
+
+    def test_list_queries_use_their_indexes(self):
+        for description, queryset, index_name in plan_checks(self.user):
+            with self.subTest(description):
+                self.assertIn(index_name, queryset.explain())
+
+
+class MessagePaginationTests(TestCase):
+    """Conversation history pages walk every message once, oldest first, across timestamp ties"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='pages')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.conversation = Conversation.objects.create(user=self.user, title='pages')
+        messages = Message.objects.bulk_create([
+            Message(conversation=self.conversation, message_type='user', content=str(index)) for index in range(8)
+        ])
+        # Messages written in the same turn can share a timestamp; ids break the tie
+        start = timezone.now()
+        for index, message in enumerate(messages):
+            Message.objects.filter(pk=message.pk).update(timestamp=start + timedelta(seconds=index // 3))
+        self.expected = list(Message.objects.order_by('timestamp', 'id').values_list('id', flat=True))
+
+    def test_pages_cover_all_messages_in_order(self):
+        url = f'/api/chat/conversations/{self.conversation.id}/?page_size=2'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(message['id'] for message in response.data['conversation']['messages'])
+            url = response.data['next']
+        self.assertEqual(seen, self.expected)
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(f'/api/chat/conversations/{self.conversation.id}/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+
+class RefinementAttributesTests(SimpleTestCase):
+    """Only size and color refinements skip extraction; anything else is a new request"""
+
+    def test_size_and_color_terms_by_kind(self):
+        self.assertEqual(refinement_attributes("Same but in blue, and smaller please"),
+                         {"color": ["blue"], "size": ["smaller"]})
+
+    def test_price_only_messages_are_extracted(self):
+        self.assertIsNone(refinement_attributes("cheaper"))
+        self.assertIsNone(refinement_attributes("under $50"))
+
+    def test_new_vocabulary_is_not_a_refinement(self):
+        self.assertIsNone(refinement_attributes("blue vintage denim jacket"))
+
+
+class ExtractionValidationTests(SimpleTestCase):
+    """Two-call extraction output is validated before it is returned or cached"""
+
+    def extract(self, text):
+        service = GeminiService()
+        service.model = mock.Mock(**{'generate_content.return_value': mock.Mock(text=text)})
+        with mock.patch.object(service, 'get_cached_extraction', return_value=None), \
+                mock.patch.object(service, 'cache_extraction') as cache_extraction:
+            return service.extract_cultural_preferences("cozy cabin vibes"), cache_extraction
+
+    def test_malformed_output_is_not_cached(self):
+        signals, cache_extraction = self.extract('{"aesthetic_keywords": ["cozy"], "confidence_score": "high"}')
+        cache_extraction.assert_not_called()
+        self.assertEqual(signals["aesthetic_keywords"], [])
+
+    def test_valid_output_is_coerced_and_cached(self):
+        signals, cache_extraction = self.extract('```json\n{"aesthetic_keywords": [" cozy ", 3], "confidence_score": 2}\n```')
+        cache_extraction.assert_called_once_with("cozy cabin vibes", signals)
+        self.assertEqual(signals["aesthetic_keywords"], ["cozy"])
+        self.assertEqual(signals["confidence_score"], 1.0)
+
+
+class SignalStateTests(SimpleTestCase):
+    """Signal state carried between turns only keeps successful Qloo results"""
+
+    def setUp(self):
+        self.service = QlooService()
+        self.preferences = {"entities_to_search": ["wes anderson"], "tags_to_search": ["pastel"]}
+        self.entity = mock.patch.object(self.service, 'search_entities', return_value=[{"id": "E1"}])
+        self.tag = mock.patch.object(self.service, 'search_tags', return_value=[{"id": "T1"}])
+        self.entity.start()
+        self.tag.start()
+        self.addCleanup(self.entity.stop)
+        self.addCleanup(self.tag.stop)
+
+    def map(self, state, insights, trends):
+        with mock.patch.object(self.service, 'get_cultural_insights', return_value=insights) as get_insights, \
+                mock.patch.object(self.service, 'get_cultural_trends', return_value=trends) as get_trends:
+            result = self.service.map_cultural_to_products(self.preferences, state)
+        return result, get_insights, get_trends
+
+    def test_failed_calls_are_retried_next_turn(self):
+        state = {}
+        failure = {"success": False, "error": "API error: 503"}
+        result, _, _ = self.map(state, failure, failure)
+        self.assertEqual(result["qloo_mapping"]["insights_found"], 0)
+        self.assertNotIn("insights", state)
+        self.assertNotIn("trends", state)
+
+        insights = {"success": True, "cultural_insights": [{"name": "pastel"}]}
+        trends = {"success": True, "trends": [{"name": "cottagecore"}]}
+        result, get_insights, get_trends = self.map(state, insights, trends)
+        get_insights.assert_called_once()
+        get_trends.assert_called_once()
+        self.assertEqual(result["qloo_mapping"]["insights_found"], 1)
+        self.assertEqual(result["qloo_mapping"]["trends_found"], 1)
+
+    def test_successful_calls_are_reused(self):
+        state = {}
+        insights = {"success": True, "cultural_insights": [{"name": "pastel"}]}
+        trends = {"success": True, "trends": [{"name": "cottagecore"}]}
+        self.map(state, insights, trends)
+
+        result, get_insights, get_trends = self.map(state, insights, trends)
+        get_insights.assert_not_called()
+        get_trends.assert_not_called()
+        self.assertEqual(result["qloo_mapping"]["insights_found"], 1)
+        self.assertEqual(result["qloo_mapping"]["trends_found"], 1)
@@ -4,8 +4,10 @@ from . import views
 
 urlpatterns = [
     path('', views.chat, name='chat'),
+    path('stream/', views.chat_stream, name='chat-stream'),
     path('conversations/', views.ConversationListView.as_view(), name='conversations'),
     path('conversations/<int:conversation_id>/', views.conversation_history, name='conversation-history'),
     path('conversations/<int:conversation_id>/delete/', views.delete_conversation, name='delete-conversation'),
+    path('product-jobs/<str:job_id>/', views.product_job, name='product-job'),
     path('cultural-preferences/', views.CulturalPreferenceView.as_view(), name='cultural-preferences'),
 ]
\ No newline at end of file
@@ -1,19 +1,30 @@
 # chat/views.py
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
 from rest_framework import status, generics
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from .models import Conversation, Message, CulturalPreference
+from fesoni.pagination import KeysetPagination
+from .models import Conversation, CulturalPreference
 from .serializers import (
-    ConversationSerializer, 
     ConversationListSerializer,
     ChatRequestSerializer,
     CulturalPreferenceSerializer
 )
+from .renderers import EventStreamRenderer
 from .services import ChatService
 
 chat_service = ChatService()
 
+class MessageCursorPagination(KeysetPagination):
+    """Oldest-first pages of a conversation's messages"""
+    ordering = ('timestamp', 'id')
+    page_size = 50
+    max_page_size = 200
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def chat(request):
@@ -28,10 +39,7 @@ def chat(request):
         )
         
         if result['success']:
-            # Update conversation's cultural context summary with Qloo insights
-            if result['conversation_id']:
-                conversation = Conversation.objects.get(id=result['conversation_id'])
-                conversation.update_cultural_context_summary(result['cultural_context'])
+            # The conversation's cultural context summary is updated within the turn
             return Response({
                 'success': True,
                 'conversation_id': result['conversation_id'],
@@ -39,31 +47,76 @@ def chat(request):
                 'cultural_context': result['cultural_context'],
                 'qloo_data': result['qloo_data'],
                 'products': result['products'],
-                'voice_input': result['voice_input']
+                'product_job': result['product_job'],
+                'voice_input': result['voice_input'],
+                'degraded_services': result['degraded_services']
             }, status=status.HTTP_200_OK)
         else:
             return Response(result, status=status.HTTP_400_BAD_REQUEST)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def chat_stream(request):
+    """Stream a chat turn as server-sent events: tokens first, then Qloo context and products"""
+    serializer = ChatRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    events = chat_service.stream_message(
+        user=request.user,
+        message=serializer.validated_data['message'],
+        conversation_id=serializer.validated_data.get('conversation_id'),
+        voice_input=serializer.validated_data.get('voice_input', False)
+    )
+    
+    def event_stream():
+        for event, data in events:
+            yield f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+    
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def conversation_history(request, conversation_id):
-    """Retrieve conversation history with Qloo-driven cultural insights"""
-    result = chat_service.get_conversation_history(request.user, conversation_id)
+    """Retrieve conversation history with Qloo-driven cultural insights, one page of messages at a time"""
+    paginator = MessageCursorPagination()
+    result = chat_service.get_conversation_history(
+        request.user,
+        conversation_id,
+        paginate=lambda messages: paginator.paginate_queryset(messages, request)
+    )
     
     if result['success']:
+        result['next'] = paginator.get_next_link()
         return Response(result, status=status.HTTP_200_OK)
     else:
         return Response(result, status=status.HTTP_404_NOT_FOUND)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def product_job(request, job_id):
+    """Poll for products discovered asynchronously via Qloo's Taste AI™ for a chat turn"""
+    result = chat_service.get_product_job(request.user, job_id)
+    
+    if not result['success']:
+        return Response(result, status=status.HTTP_404_NOT_FOUND)
+    if result['status'] == 'pending':
+        return Response(result, status=status.HTTP_202_ACCEPTED)
+    return Response(result, status=status.HTTP_200_OK)
+
 class ConversationListView(generics.ListAPIView):
     """List user's conversations with Qloo-powered cultural context"""
     serializer_class = ConversationListSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Conversation.objects.filter(user=self.request.user, is_active=True)
+        return Conversation.objects.filter(user=self.request.user, is_active=True).with_message_summary()
 
 class CulturalPreferenceView(generics.ListAPIView):
     """Retrieve user's cultural preferences powered by Qloo's Taste AI™"""
@@ -0,0 +1,5 @@
+# fesoni/__init__.py
+# Load the Celery app whenever Django starts so @shared_task uses its broker settings
+from .celery import app as celery_app
+
+__all__ = ('celery_app',)
@@ -0,0 +1,357 @@
+# fesoni/caching.py
+"""Read-through caching helpers on top of Django's configured cache (Redis)"""
+import copy
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from django.core.cache import cache
+
+from . import ratelimit
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+_registry: Dict[str, 'ReadThroughCache'] = {}
+
+# Background revalidation runs off the request thread on a small shared pool
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='cache-refresh')
+
+
+def normalize_text(value: Any) -> str:
+    """Lowercase and collapse whitespace so equivalent queries share a cache key"""
+    if value is None:
+        return ''
+    return ' '.join(str(value).lower().split())
+
+
+def make_cache_key(namespace: str, parts: Iterable[Any]) -> str:
+    """Build a fixed-length cache key from normalized key parts"""
+    raw = '\x1f'.join(normalize_text(part) for part in parts)
+    digest = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counters for every read-through cache in this process"""
+    return {namespace: cache_.stats() for namespace, cache_ in _registry.items()}
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+
+class ReadThroughCache:
+    """
+    Cache values returned by a fetch function under a normalized key.
+
+    ``fetch`` returns ``None`` to signal an upstream failure; failures are never
+    cached. Empty results are cached for ``negative_ttl`` so unresolvable queries
+    don't hit the upstream API on every request either. With ``coalesce`` set,
+    concurrent misses for the same key in this process share one fetch.
+    """
+
+    def __init__(self, namespace: str, ttl: int, negative_ttl: Optional[int] = None, coalesce: bool = False):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self._flights = SingleFlight() if coalesce else None
+        self._hits = 0
+        self._misses = 0
+        self._stale = 0
+        self._lock = threading.Lock()
+        _registry[namespace] = self
+
+    def make_key(self, parts: Iterable[Any]) -> str:
+        return make_cache_key(self.namespace, parts)
+
+    def get_or_fetch(self, parts: Iterable[Any], fetch: Callable[[], Optional[Any]], default: Any = None) -> Any:
+        key = self.make_key(parts)
+
+        cached = self._get(key)
+        if cached is not _MISSING:
+            self._record(hit=True)
+            return cached
+
+        self._record(hit=False)
+        return self._miss(key, fetch, default)
+
+    def _miss(self, key: str, fetch: Callable[[], Optional[Any]], default: Any) -> Any:
+        if self._flights is not None:
+            value = self._flights.do(key, lambda: self._fetch_and_store(key, fetch))
+        else:
+            value = self._fetch_and_store(key, fetch)
+        return default if value is None else value
+
+    def _fetch_and_store(self, key: str, fetch: Callable[[], Optional[Any]]) -> Optional[Any]:
+        value = fetch()
+        if value is not None:
+            self._store(key, value)
+        return value
+
+    def _store(self, key: str, value: Any):
+        self._set(key, value, self.negative_ttl if not value else self.ttl)
+
+    def invalidate(self, parts: Iterable[Any]):
+        try:
+            cache.delete(self.make_key(parts))
+        except Exception as e:
+            logger.warning(f"Cache delete failed for {self.namespace}: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self._hits, 'misses': self._misses, 'stale': self._stale}
+
+    def _record(self, hit: bool, stale: bool = False):
+        with self._lock:
+            if hit:
+                self._hits += 1
+                if stale:
+                    self._stale += 1
+            else:
+                self._misses += 1
+
+    def _get(self, key: str) -> Any:
+        # A cache outage should degrade to a miss, not break the request
+        try:
+            return cache.get(key, _MISSING)
+        except Exception as e:
+            logger.warning(f"Cache read failed for {self.namespace}: {e}")
+            return _MISSING
+
+    def _set(self, key: str, value: Any, ttl: int):
+        try:
+            cache.set(key, value, ttl)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {self.namespace}: {e}")
+
+
+class StaleWhileRevalidateCache(ReadThroughCache):
+    """
+    Read-through cache that keeps serving an entry for ``stale_ttl`` seconds after
+    it expires, while a single background refresh replaces it.
+    """
+
+    def __init__(self, namespace: str, ttl: int, stale_ttl: int, negative_ttl: Optional[int] = None,
+                 coalesce: bool = False, refresh_lock_ttl: int = 60):
+        super().__init__(namespace, ttl, negative_ttl, coalesce)
+        self.stale_ttl = stale_ttl
+        self.refresh_lock_ttl = refresh_lock_ttl
+
+    def get_or_fetch(self, parts: Iterable[Any], fetch: Callable[[], Optional[Any]], default: Any = None) -> Any:
+        key = self.make_key(parts)
+
+        entry = self._get(key)
+        if entry is not _MISSING:
+            stale = time.time() >= entry['fresh_until']
+            self._record(hit=True, stale=stale)
+            if stale:
+                self._revalidate(key, fetch)
+            return entry['value']
+
+        self._record(hit=False)
+        return self._miss(key, fetch, default)
+
+    def _store(self, key: str, value: Any):
+        ttl = self.negative_ttl if not value else self.ttl
+        self._set(key, {'value': value, 'fresh_until': time.time() + ttl}, ttl + self.stale_ttl)
+
+    def _revalidate(self, key: str, fetch: Callable[[], Optional[Any]]):
+        # cache.add is atomic, so only one worker across processes refreshes a key
+        try:
+            acquired = cache.add(f"{key}:refreshing", 1, self.refresh_lock_ttl)
+        except Exception as e:
+            logger.warning(f"Cache refresh lock failed for {self.namespace}: {e}")
+            return
+
+        if acquired:
+            _refresh_executor.submit(self._refresh, key, fetch)
+
+    def _refresh(self, key: str, fetch: Callable[[], Optional[Any]]):
+        try:
+            # No user waits on a refresh, so it must not spend the quota reserved for interactive calls
+            with ratelimit.priority(ratelimit.BACKGROUND):
+                value = fetch()
+            if value is not None:
+                self._store(key, value)
+        except Exception as e:
+            logger.error(f"Background refresh failed for {self.namespace}: {e}")
+        finally:
+            try:
+                cache.delete(f"{key}:refreshing")
+            except Exception:
+                pass
+
+
+class LRUCache:
+    """Small thread-safe in-process LRU with a per-entry TTL"""
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class TieredCache:
+    """
+    In-process LRU (L1) in front of the shared Redis cache (L2).
+
+    Keys embed a generation number kept in Redis; ``clear()`` bumps it, which
+    invalidates every entry in every process once their cached generation
+    (re-read at most every ``generation_check_interval`` seconds) moves on.
+    """
+
+    def __init__(self, namespace: str, ttl: int, l1_maxsize: int = 1024, l1_ttl: int = 300,
+                 generation_check_interval: int = 5):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.generation_check_interval = generation_check_interval
+        self._l1 = LRUCache(l1_maxsize, l1_ttl)
+        self._generation = None
+        self._generation_checked_at = 0.0
+        self._hits = {'l1': 0, 'l2': 0}
+        self._misses = 0
+        self._lock = threading.Lock()
+        _registry[namespace] = self
+
+    def get(self, parts: Iterable[Any]) -> Any:
+        """Return the cached value for ``parts``, or None"""
+        key = self._key(parts)
+
+        # L1 holds live objects, so hand out copies that callers can mutate freely
+        value = self._l1.get(key)
+        if value is not _MISSING:
+            self._record('l1')
+            return copy.deepcopy(value)
+
+        try:
+            value = cache.get(key, _MISSING)
+        except Exception as e:
+            logger.warning(f"Cache read failed for {self.namespace}: {e}")
+            value = _MISSING
+
+        if value is _MISSING:
+            self._record(None)
+            return None
+
+        self._l1.set(key, copy.deepcopy(value))
+        self._record('l2')
+        return value
+
+    def set(self, parts: Iterable[Any], value: Any):
+        key = self._key(parts)
+        self._l1.set(key, copy.deepcopy(value))
+        try:
+            cache.set(key, value, self.ttl)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {self.namespace}: {e}")
+
+    def clear(self):
+        """Invalidate every entry in this namespace across all processes"""
+        self._l1.clear()
+        generation_key = f"{self.namespace}:generation"
+        try:
+            cache.add(generation_key, 0, None)
+            generation = cache.incr(generation_key)
+        except Exception as e:
+            logger.warning(f"Cache invalidation failed for {self.namespace}: {e}")
+            return
+        with self._lock:
+            self._generation = generation
+            self._generation_checked_at = time.monotonic()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'l1_hits': self._hits['l1'], 'l2_hits': self._hits['l2'], 'misses': self._misses}
+
+    def _record(self, level: Optional[str]):
+        with self._lock:
+            if level is None:
+                self._misses += 1
+            else:
+                self._hits[level] += 1
+
+    def _key(self, parts: Iterable[Any]) -> str:
+        return make_cache_key(f"{self.namespace}:{self._current_generation()}", parts)
+
+    def _current_generation(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            if self._generation is not None and now - self._generation_checked_at < self.generation_check_interval:
+                return self._generation
+
+        try:
+            generation = cache.get(f"{self.namespace}:generation", 0)
+        except Exception as e:
+            logger.warning(f"Cache generation read failed for {self.namespace}: {e}")
+            generation = self._generation or 0
+
+        with self._lock:
+            self._generation = generation
+            self._generation_checked_at = now
+        return generation
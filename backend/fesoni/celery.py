@@ -1,9 +1,40 @@
 # fesoni/celery.py
+import logging
 import os
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fesoni.settings')
 
+logger = logging.getLogger(__name__)
+
 app = Celery('fesoni')
 app.config_from_object('django.conf:settings', namespace='CELERY')
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+
+@worker_init.connect
+def use_background_priority(**kwargs):
+    # Tasks are background work: they leave the reserved share of API quotas to interactive requests
+    from fesoni import ratelimit
+    ratelimit.set_default_priority(ratelimit.BACKGROUND)
+
+
+@worker_process_init.connect
+def reset_http_sessions(**kwargs):
+    # A forked pool process must not share keep-alive connections with its parent
+    from fesoni import http_client
+    http_client.close_sessions()
+
+
+@worker_process_shutdown.connect
+def close_http_sessions(**kwargs):
+    from fesoni import http_client
+    http_client.close_sessions()
+
+
+@worker_process_shutdown.connect
+def log_cache_stats(**kwargs):
+    # Worker processes serve no HTTP, so their cache counters are reported on the way out
+    from fesoni.caching import get_cache_stats
+    logger.info(f"Cache stats for worker process {os.getpid()}: {get_cache_stats()}")
@@ -0,0 +1,28 @@
+# fesoni/executors.py
+"""Thread pools for work that touches the database off the request thread"""
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+
+class DatabaseThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor whose tasks get the connection handling Django gives a request.
+
+    Django only closes connections at the end of a request, so a long-lived pool
+    thread would otherwise keep its connection open for good and reuse it even
+    after the database dropped it. Each task starts and finishes with
+    close_old_connections(), which closes connections that are broken or past
+    CONN_MAX_AGE.
+    """
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        return super().submit(_with_fresh_connections, fn, *args, **kwargs)
+
+
+def _with_fresh_connections(fn, *args, **kwargs):
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
@@ -0,0 +1,154 @@
+# fesoni/http_client.py
+"""Shared outbound HTTP client for third-party APIs (Qloo, RapidAPI).
+
+Each upstream host gets its own keep-alive session and connection pool, so
+repeated calls reuse TCP+TLS connections instead of handshaking every time.
+Timeouts are looked up per endpoint, and idempotent requests are retried with
+jittered exponential backoff on 429/5xx. Endpoints are named ``<provider>.<call>``;
+calls go through the provider's rate limiter (fesoni.ratelimit), which raises
+RateLimited instead of sending a request the quota cannot cover. For limited
+providers the retries run here rather than in the transport, so every attempt
+takes its own token.
+"""
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import ratelimit
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+RETRY_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+Timeout = Union[float, Tuple[float, float]]
+
+_sessions: Dict[Tuple[str, bool], requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _config() -> Dict:
+    return getattr(settings, 'OUTBOUND_HTTP', {})
+
+
+class _CappedRetry(Retry):
+    """Retry policy that never sleeps longer than MAX_RETRY_AFTER on a Retry-After header"""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, _config().get('MAX_RETRY_AFTER', 5))
+
+
+def _build_session(host: str, transport_retries: bool = True) -> requests.Session:
+    config = _config()
+    pool_maxsize = config.get('HOST_POOL_MAXSIZE', {}).get(host, config.get('POOL_MAXSIZE', 20))
+
+    retry = 0
+    if transport_retries:
+        retry = _CappedRetry(
+            total=config.get('MAX_RETRIES', 2),
+            backoff_factor=config.get('BACKOFF_FACTOR', 0.3),
+            backoff_jitter=config.get('BACKOFF_JITTER', 0.3),
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=RETRY_METHODS,
+            respect_retry_after_header=True,
+            # Hand the final 429/5xx response back to the caller instead of raising,
+            # so services keep their existing status-code handling
+            raise_on_status=False,
+        )
+    adapter = HTTPAdapter(
+        pool_connections=config.get('POOL_CONNECTIONS', 10),
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(url: str, transport_retries: bool = True) -> requests.Session:
+    """Return the pooled session for the host of ``url``, creating it on first use"""
+    key = (urlsplit(url).netloc, transport_retries)
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _build_session(key[0], transport_retries)
+                _sessions[key] = session
+    return session
+
+
+def get_timeout(endpoint: Optional[str] = None) -> Timeout:
+    """Return the (connect, read) timeout configured for ``endpoint``"""
+    config = _config()
+    default = config.get('DEFAULT_TIMEOUT', (3.05, 10))
+    if endpoint is None:
+        return default
+    return config.get('TIMEOUTS', {}).get(endpoint, default)
+
+
+def request(method: str, url: str, endpoint: Optional[str] = None, **kwargs) -> requests.Response:
+    """Send a request through the pooled session for the target host"""
+    kwargs.setdefault('timeout', get_timeout(endpoint))
+    provider = endpoint.split('.', 1)[0] if endpoint else None
+    if provider is None or ratelimit.get_limiter(provider) is None:
+        return get_session(url).request(method, url, **kwargs)
+    return _limited_request(provider, method, url, **kwargs)
+
+
+def _limited_request(provider: str, method: str, url: str, **kwargs) -> requests.Response:
+    """Send with the transport's retry policy, taking a rate-limit token for every attempt"""
+    config = _config()
+    session = get_session(url, transport_retries=False)
+    retries = config.get('MAX_RETRIES', 2) if method.upper() in RETRY_METHODS else 0
+
+    for attempt in range(retries + 1):
+        try:
+            with ratelimit.limit(provider):
+                response = session.request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == retries:
+                raise
+            time.sleep(_backoff(config, attempt))
+            continue
+
+        if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+            break
+        # Waiting happens without holding a concurrency slot
+        retry_after = _CappedRetry().get_retry_after(response)
+        time.sleep(retry_after if retry_after is not None else _backoff(config, attempt))
+
+    if response.status_code == 429:
+        # Still throttled after retries: the provider quota is tighter than our limits
+        ratelimit.mark_degraded(provider)
+    return response
+
+
+def _backoff(config: Dict, attempt: int) -> float:
+    return config.get('BACKOFF_FACTOR', 0.3) * (2 ** attempt) + random.uniform(0, config.get('BACKOFF_JITTER', 0.3))
+
+
+def get(url: str, endpoint: Optional[str] = None, **kwargs) -> requests.Response:
+    """GET ``url`` using the shared pool; ``endpoint`` selects the configured timeout"""
+    return request('GET', url, endpoint=endpoint, **kwargs)
+
+
+def close_sessions():
+    """Close all pooled sessions (e.g. after a worker fork)"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,102 @@
+# fesoni/pagination.py
+import base64
+import json
+from urllib.parse import urlencode
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a (timestamp, id) ordering.
+
+    Each page filters past the last row of the previous one instead of using an
+    OFFSET, so deep pages cost the same as the first one when an index covers
+    ``ordering``. Subclasses set ``ordering`` to the timestamp field and ``id``,
+    prefixed with ``-`` for newest-first.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        timestamp_field = self.ordering[0].lstrip('-')
+        descending = self.ordering[0].startswith('-')
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            timestamp, pk = cursor
+            lookup = 'lt' if descending else 'gt'
+            # The inclusive range bound lets the planner seek on the index; the OR breaks ties on id
+            queryset = queryset.filter(**{f'{timestamp_field}__{lookup}e': timestamp}).filter(
+                Q(**{f'{timestamp_field}__{lookup}': timestamp}) | Q(**{f'id__{lookup}': pk})
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        page = rows[:self.page_size]
+
+        self.next_cursor = None
+        if self.has_next:
+            last = page[-1]
+            self.next_cursor = self.encode_cursor(getattr(last, timestamp_field), last.pk)
+
+        return page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        params = self.request.query_params.copy()
+        params[self.cursor_query_param] = self.next_cursor
+        return self.request.build_absolute_uri(f"{self.request.path}?{urlencode(params)}")
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def encode_cursor(self, timestamp, pk) -> str:
+        raw = json.dumps([timestamp.isoformat(), pk]).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            timestamp, pk = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            timestamp = parse_datetime(timestamp)
+            if timestamp is None:
+                raise ValueError
+            return timestamp, int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
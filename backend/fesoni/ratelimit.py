@@ -0,0 +1,254 @@
+# fesoni/ratelimit.py
+"""Outbound rate limiting and concurrency caps for third-party APIs (Qloo, RapidAPI, Gemini).
+
+Every provider configured in OUTBOUND_RATE_LIMITS gets:
+
+* a token bucket in Redis shared by all processes (RATE tokens per second,
+  BURST capacity), updated atomically by a Lua script on Redis' own clock;
+* a per-process cap on calls in flight (CONCURRENCY).
+
+When either is exhausted the POLICY decides: 'queue' waits up to MAX_WAIT
+seconds, 'shed' fails at once. Either way the caller gets RateLimited rather
+than a provider 429. Interactive sheds (and upstream 429s, see http_client)
+report the provider as degraded for a short while so responses can say why
+results are thin; background sheds are expected under load and do not.
+
+Calls run at interactive priority unless marked background (Celery workers
+and stale-cache refreshes are, see fesoni.celery and fesoni.caching). Background calls may not take the last
+OUTBOUND_RATE_LIMIT_RESERVE share of a provider's tokens or slots, which
+stay available for users waiting on a response.
+"""
+import contextvars
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+
+_priority: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('outbound_priority', default=None)
+_default_priority = INTERACTIVE
+
+# Refill by elapsed time, then take one token unless that would dip into the reserve.
+# Returns {allowed, seconds until a token is available}; floats go back as strings
+# because Lua numbers are truncated to integers in replies.
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local reserve = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens - 1 >= reserve then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (reserve + 1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+
+class RateLimited(Exception):
+    """An outbound call was refused locally because the provider's quota is exhausted"""
+
+    def __init__(self, provider: str, reason: str):
+        super().__init__(f"{provider} rate limited ({reason})")
+        self.provider = provider
+        self.reason = reason
+
+
+def current_priority() -> str:
+    return _priority.get() or _default_priority
+
+
+def set_default_priority(level: str):
+    """Priority for calls made outside a ``priority`` block in this process"""
+    global _default_priority
+    _default_priority = level
+
+
+@contextmanager
+def priority(level: str):
+    """Run the enclosed outbound calls at ``level`` (INTERACTIVE or BACKGROUND)"""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _LocalBucket:
+    """In-process token bucket, used when the cache is not Redis or Redis is unreachable"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, reserve: float) -> Tuple[bool, float]:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens - 1 >= reserve:
+                self._tokens -= 1
+                return True, 0.0
+            return False, (reserve + 1 - self._tokens) / self.rate
+
+
+class _RedisBucket:
+    """Token bucket shared by every process through the Redis behind the default cache"""
+
+    def __init__(self, key: str, rate: float, burst: float):
+        self.key = key
+        self.rate = rate
+        self.burst = burst
+        self._fallback = _LocalBucket(rate, burst)
+        self._script = None
+
+    def take(self, reserve: float) -> Tuple[bool, float]:
+        backend = caches['default']
+        if not isinstance(backend, RedisCache):
+            return self._fallback.take(reserve)
+
+        try:
+            if self._script is None:
+                self._script = backend._cache.get_client(write=True).register_script(_TOKEN_BUCKET_SCRIPT)
+            allowed, wait = self._script(keys=[self.key], args=[self.rate, self.burst, reserve])
+            return bool(int(allowed)), float(wait)
+        except Exception as e:
+            # Losing Redis only loosens the limit to per-process, it must not block calls
+            logger.warning(f"Rate limiter Redis error for {self.key}, limiting per process: {e}")
+            return self._fallback.take(reserve)
+
+
+class ProviderLimiter:
+    def __init__(self, provider: str, rate: float, burst: float, concurrency: int, policy: str = 'queue',
+                 max_wait: float = 1.0, background_max_wait: Optional[float] = None, reserve: float = 0.0):
+        self.provider = provider
+        self.policy = policy
+        self.max_wait = max_wait
+        self.background_max_wait = max_wait if background_max_wait is None else background_max_wait
+        self._bucket = _RedisBucket(f"ratelimit:{provider}", rate, burst)
+        self._token_reserve = burst * reserve
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._background_slots = threading.BoundedSemaphore(max(1, concurrency - math.ceil(concurrency * reserve)))
+
+    @contextmanager
+    def acquire(self):
+        """Hold a concurrency slot and one token for the enclosed call, or raise RateLimited"""
+        background = current_priority() == BACKGROUND
+        wait = self.background_max_wait if background else self.max_wait
+        deadline = time.monotonic() + (wait if self.policy == 'queue' else 0.0)
+
+        held = []
+        try:
+            if background:
+                self._take_slot(self._background_slots, deadline, background)
+                held.append(self._background_slots)
+            self._take_slot(self._slots, deadline, background)
+            held.append(self._slots)
+            self._take_token(deadline, background)
+            yield
+        finally:
+            for semaphore in reversed(held):
+                semaphore.release()
+
+    def _take_slot(self, semaphore: threading.BoundedSemaphore, deadline: float, background: bool):
+        if not semaphore.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            self._shed('concurrency', background)
+
+    def _take_token(self, deadline: float, background: bool):
+        reserve = self._token_reserve if background else 0.0
+        while True:
+            allowed, retry_in = self._bucket.take(reserve)
+            if allowed:
+                return
+            remaining = deadline - time.monotonic()
+            if retry_in > remaining:
+                self._shed('rate', background)
+            time.sleep(retry_in)
+
+    def _shed(self, reason: str, background: bool):
+        # Background work is shed first by design; only users going without results is degradation
+        if not background:
+            mark_degraded(self.provider)
+        raise RateLimited(self.provider, reason)
+
+
+_limiters: Dict[str, Optional[ProviderLimiter]] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str) -> Optional[ProviderLimiter]:
+    """The limiter for ``provider``, or None when it has no configured limits"""
+    if provider not in _limiters:
+        with _limiters_lock:
+            if provider not in _limiters:
+                _limiters[provider] = _build_limiter(provider)
+    return _limiters[provider]
+
+
+def _build_limiter(provider: str) -> Optional[ProviderLimiter]:
+    config = getattr(settings, 'OUTBOUND_RATE_LIMITS', {}).get(provider)
+    if not config:
+        return None
+    return ProviderLimiter(
+        provider,
+        rate=config['RATE'],
+        burst=config.get('BURST', config['RATE']),
+        concurrency=config.get('CONCURRENCY', 8),
+        policy=config.get('POLICY', 'queue'),
+        max_wait=config.get('MAX_WAIT', 1.0),
+        background_max_wait=config.get('BACKGROUND_MAX_WAIT'),
+        reserve=getattr(settings, 'OUTBOUND_RATE_LIMIT_RESERVE', 0.0)
+    )
+
+
+@contextmanager
+def limit(provider: str):
+    """Rate- and concurrency-limit the enclosed call to ``provider``"""
+    limiter = get_limiter(provider)
+    if limiter is None:
+        yield
+        return
+    with limiter.acquire():
+        yield
+
+
+def mark_degraded(provider: str):
+    """Report ``provider`` as degraded (shed calls or upstream 429s) for OUTBOUND_DEGRADED_TTL seconds"""
+    try:
+        cache.set(f"ratelimit:degraded:{provider}", 1, getattr(settings, 'OUTBOUND_DEGRADED_TTL', 30))
+    except Exception as e:
+        logger.warning(f"Cache write failed for degraded provider {provider}: {e}")
+
+
+def degraded_providers() -> List[str]:
+    """Providers that recently shed calls or returned 429s"""
+    providers = list(getattr(settings, 'OUTBOUND_RATE_LIMITS', {}))
+    try:
+        flagged = cache.get_many([f"ratelimit:degraded:{provider}" for provider in providers])
+    except Exception as e:
+        logger.warning(f"Cache read failed for degraded providers: {e}")
+        return []
+    return [provider for provider in providers if f"ratelimit:degraded:{provider}" in flagged]
@@ -19,6 +19,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'corsheaders',
@@ -129,6 +130,138 @@ GOOGLE_API_KEY = config('GOOGLE_API_KEY', default='')
 QLOO_API_KEY = config('QLOO_API_KEY', default='')
 RAPIDAPI_KEY = config('RAPIDAPI_KEY', default='')
 
+# Extract cultural signals and write the reply in one Gemini call; off until the combined prompt
+# has been validated against the configured model, which leaves the two-call path
+GEMINI_SINGLE_CALL_TURN = config('GEMINI_SINGLE_CALL_TURN', default=False, cast=bool)
+
+# Cultural-signal extraction cache: Redis TTL plus an in-process LRU in front of it
+GEMINI_EXTRACTION_CACHE_TTL = config('GEMINI_EXTRACTION_CACHE_TTL', default=60 * 60 * 24 * 7, cast=int)
+GEMINI_EXTRACTION_L1_SIZE = config('GEMINI_EXTRACTION_L1_SIZE', default=1024, cast=int)
+GEMINI_EXTRACTION_L1_TTL = config('GEMINI_EXTRACTION_L1_TTL', default=60 * 5, cast=int)
+
+# Upper bound on concurrent Qloo lookups per chat turn
+QLOO_MAX_WORKERS = config('QLOO_MAX_WORKERS', default=8, cast=int)
+
+# Qloo entity/tag resolution cache TTLs (seconds); empty results use the negative TTL
+QLOO_RESOLUTION_CACHE_TTL = config('QLOO_RESOLUTION_CACHE_TTL', default=60 * 60 * 24, cast=int)
+QLOO_RESOLUTION_NEGATIVE_TTL = config('QLOO_RESOLUTION_NEGATIVE_TTL', default=60 * 30, cast=int)
+
+# Qloo insights cache: fresh for QLOO_INSIGHTS_CACHE_TTL, then served stale while refreshing
+QLOO_INSIGHTS_CACHE_TTL = config('QLOO_INSIGHTS_CACHE_TTL', default=60 * 60 * 6, cast=int)
+QLOO_INSIGHTS_STALE_TTL = config('QLOO_INSIGHTS_STALE_TTL', default=60 * 60 * 24, cast=int)
+
+# Amazon (RapidAPI) search result cache TTLs (seconds)
+AMAZON_SEARCH_CACHE_TTL = config('AMAZON_SEARCH_CACHE_TTL', default=60 * 30, cast=int)
+AMAZON_SEARCH_NEGATIVE_TTL = config('AMAZON_SEARCH_NEGATIVE_TTL', default=60 * 5, cast=int)
+AMAZON_DETAILS_CACHE_TTL = config('AMAZON_DETAILS_CACHE_TTL', default=60 * 60 * 6, cast=int)
+
+# Catalog details younger than this (seconds) are served from the database instead of RapidAPI
+PRODUCT_CATALOG_DETAILS_MAX_AGE = config('PRODUCT_CATALOG_DETAILS_MAX_AGE', default=60 * 60 * 24, cast=int)
+
+# Local full-text search over the catalog runs before RapidAPI: catalog products refreshed
+# within PRODUCT_LOCAL_SEARCH_MAX_AGE seconds are candidates, and RapidAPI is only queried
+# when fewer than PRODUCT_LOCAL_SEARCH_MIN_RESULTS match
+PRODUCT_LOCAL_SEARCH_ENABLED = config('PRODUCT_LOCAL_SEARCH_ENABLED', default=True, cast=bool)
+PRODUCT_LOCAL_SEARCH_MIN_RESULTS = config('PRODUCT_LOCAL_SEARCH_MIN_RESULTS', default=24, cast=int)
+PRODUCT_LOCAL_SEARCH_LIMIT = config('PRODUCT_LOCAL_SEARCH_LIMIT', default=60, cast=int)
+PRODUCT_LOCAL_SEARCH_MAX_AGE = config('PRODUCT_LOCAL_SEARCH_MAX_AGE', default=60 * 60 * 24 * 7, cast=int)
+
+# Product embeddings: PRODUCT_EMBEDDING_MODEL names a sentence-transformers model to run on
+# CPU (optional dependency); empty uses hashed character n-grams of PRODUCT_EMBEDDING_DIM.
+# The catalog store in PRODUCT_EMBEDDING_DIR is built by `manage.py build_product_embeddings`
+# and adds up to PRODUCT_EMBEDDING_CANDIDATES local candidates; PRODUCT_EMBEDDING_WEIGHT is
+# the share of the match score taken by semantic similarity, off by default with the n-gram
+# encoder since spelling overlap says nothing about meaning
+PRODUCT_EMBEDDING_MODEL = config('PRODUCT_EMBEDDING_MODEL', default='')
+PRODUCT_EMBEDDING_DIM = config('PRODUCT_EMBEDDING_DIM', default=512, cast=int)
+PRODUCT_EMBEDDING_BATCH_SIZE = config('PRODUCT_EMBEDDING_BATCH_SIZE', default=64, cast=int)
+PRODUCT_EMBEDDING_DIR = config('PRODUCT_EMBEDDING_DIR', default=os.path.join(BASE_DIR, 'embeddings'))
+PRODUCT_EMBEDDING_CANDIDATES = config('PRODUCT_EMBEDDING_CANDIDATES', default=30, cast=int)
+PRODUCT_EMBEDDING_MIN_SIMILARITY = config('PRODUCT_EMBEDDING_MIN_SIMILARITY', default=0.2, cast=float)
+PRODUCT_EMBEDDING_WEIGHT = config('PRODUCT_EMBEDDING_WEIGHT', default=0.2 if PRODUCT_EMBEDDING_MODEL else 0.0, cast=float)
+
+# Keyword/insight to product category taxonomy; the file is recompiled when it changes,
+# checked at most every CATEGORY_TAXONOMY_RELOAD_INTERVAL seconds
+CATEGORY_TAXONOMY_PATH = config('CATEGORY_TAXONOMY_PATH', default=os.path.join(BASE_DIR, 'chat', 'data', 'category_taxonomy.json'))
+CATEGORY_TAXONOMY_RELOAD_INTERVAL = config('CATEGORY_TAXONOMY_RELOAD_INTERVAL', default=5, cast=int)
+
+# Candidates fetched per Amazon query, and how many of the best-scoring are returned
+PRODUCT_SEARCH_CANDIDATES = config('PRODUCT_SEARCH_CANDIDATES', default=15, cast=int)
+PRODUCT_SEARCH_RESULTS = config('PRODUCT_SEARCH_RESULTS', default=12, cast=int)
+
+# Multi-query retrieval: keywords are split into groups of PRODUCT_SEARCH_GROUP_SIZE,
+# each searched over PRODUCT_SEARCH_PAGES pages in parallel; queries still running
+# after PRODUCT_SEARCH_LATENCY_BUDGET seconds are dropped
+PRODUCT_SEARCH_GROUP_SIZE = config('PRODUCT_SEARCH_GROUP_SIZE', default=3, cast=int)
+PRODUCT_SEARCH_MAX_GROUPS = config('PRODUCT_SEARCH_MAX_GROUPS', default=3, cast=int)
+PRODUCT_SEARCH_PAGES = config('PRODUCT_SEARCH_PAGES', default=1, cast=int)
+PRODUCT_SEARCH_LATENCY_BUDGET = config('PRODUCT_SEARCH_LATENCY_BUDGET', default=8.0, cast=float)
+PRODUCT_SEARCH_MAX_WORKERS = config('PRODUCT_SEARCH_MAX_WORKERS', default=8, cast=int)
+
+# Background discovery fetches details for the top PRODUCT_ENRICH_TOP_K results (0 disables),
+# at most PRODUCT_ENRICH_MAX_CONCURRENCY at a time, and reranks them by blending in the
+# detail-based fit score with PRODUCT_ENRICH_FIT_WEIGHT
+PRODUCT_ENRICH_TOP_K = config('PRODUCT_ENRICH_TOP_K', default=6, cast=int)
+PRODUCT_ENRICH_MAX_CONCURRENCY = config('PRODUCT_ENRICH_MAX_CONCURRENCY', default=4, cast=int)
+PRODUCT_ENRICH_LATENCY_BUDGET = config('PRODUCT_ENRICH_LATENCY_BUDGET', default=20.0, cast=float)
+PRODUCT_ENRICH_FIT_WEIGHT = config('PRODUCT_ENRICH_FIT_WEIGHT', default=0.5, cast=float)
+
+# Outbound HTTP (shared pooled client for Qloo and RapidAPI)
+OUTBOUND_HTTP = {
+    'POOL_CONNECTIONS': config('HTTP_POOL_CONNECTIONS', default=10, cast=int),
+    'POOL_MAXSIZE': config('HTTP_POOL_MAXSIZE', default=20, cast=int),
+    'HOST_POOL_MAXSIZE': {},
+    'MAX_RETRIES': config('HTTP_MAX_RETRIES', default=2, cast=int),
+    'BACKOFF_FACTOR': config('HTTP_BACKOFF_FACTOR', default=0.3, cast=float),
+    'BACKOFF_JITTER': config('HTTP_BACKOFF_JITTER', default=0.3, cast=float),
+    'MAX_RETRY_AFTER': 5,
+    'DEFAULT_TIMEOUT': (3.05, 10),
+    # (connect, read) timeouts per endpoint
+    'TIMEOUTS': {
+        'qloo.search': (3.05, 8),
+        'qloo.tags': (3.05, 8),
+        'qloo.insights': (3.05, 15),
+        'qloo.trends': (3.05, 10),
+        'rapidapi.search': (3.05, 10),
+        'rapidapi.details': (3.05, 15),
+    },
+}
+
+# Outbound rate limits per provider (the prefix of the endpoint names above, plus 'gemini'):
+# RATE tokens/second refilling a BURST-sized bucket shared through Redis, and at most CONCURRENCY
+# calls in flight per process. When exhausted, POLICY 'queue' waits up to MAX_WAIT seconds
+# (BACKGROUND_MAX_WAIT for Celery work) and 'shed' fails at once. Background calls never take the
+# last OUTBOUND_RATE_LIMIT_RESERVE share of tokens or slots. Providers that shed calls or answer
+# 429 are reported as degraded for OUTBOUND_DEGRADED_TTL seconds.
+OUTBOUND_RATE_LIMITS = {
+    'qloo': {
+        'RATE': config('QLOO_RATE_LIMIT', default=20, cast=float),
+        'BURST': config('QLOO_RATE_BURST', default=40, cast=int),
+        'CONCURRENCY': config('QLOO_MAX_CONCURRENCY', default=16, cast=int),
+        'POLICY': 'queue',
+        'MAX_WAIT': 1.0,
+        'BACKGROUND_MAX_WAIT': 5.0,
+    },
+    'rapidapi': {
+        'RATE': config('RAPIDAPI_RATE_LIMIT', default=5, cast=float),
+        'BURST': config('RAPIDAPI_RATE_BURST', default=10, cast=int),
+        'CONCURRENCY': config('RAPIDAPI_MAX_CONCURRENCY', default=8, cast=int),
+        'POLICY': 'queue',
+        'MAX_WAIT': 1.5,
+        'BACKGROUND_MAX_WAIT': 10.0,
+    },
+    'gemini': {
+        'RATE': config('GEMINI_RATE_LIMIT', default=5, cast=float),
+        'BURST': config('GEMINI_RATE_BURST', default=10, cast=int),
+        'CONCURRENCY': config('GEMINI_MAX_CONCURRENCY', default=8, cast=int),
+        'POLICY': 'queue',
+        'MAX_WAIT': 3.0,
+        'BACKGROUND_MAX_WAIT': 10.0,
+    },
+}
+OUTBOUND_RATE_LIMIT_RESERVE = config('OUTBOUND_RATE_LIMIT_RESERVE', default=0.25, cast=float)
+OUTBOUND_DEGRADED_TTL = config('OUTBOUND_DEGRADED_TTL', default=30, cast=int)
+
 
 # Celery Configuration
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379')
@@ -137,6 +270,25 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_RESULT_EXPIRES = 60 * 60
+
+# Learned taste: each message decays earlier weights by TASTE_VECTOR_DECAY; each dimension keeps
+# its TASTE_VECTOR_MAX_TERMS strongest terms, and up to TASTE_SEED_TERMS of them fill spare
+# Qloo entity/tag slots during product discovery
+TASTE_VECTOR_DECAY = config('TASTE_VECTOR_DECAY', default=0.9, cast=float)
+TASTE_VECTOR_MAX_TERMS = config('TASTE_VECTOR_MAX_TERMS', default=50, cast=int)
+TASTE_VECTOR_PROFILE_TERMS = config('TASTE_VECTOR_PROFILE_TERMS', default=10, cast=int)
+TASTE_SEED_TERMS = config('TASTE_SEED_TERMS', default=2, cast=int)
+
+# Values kept per list in a conversation's cultural context summary
+CONVERSATION_SUMMARY_MAX_TERMS = config('CONVERSATION_SUMMARY_MAX_TERMS', default=20, cast=int)
+
+# How long (seconds) a conversation's last cultural context and resolved Qloo signals are kept
+# for reuse by its follow-up turns
+CONVERSATION_SIGNAL_CACHE_TTL = config('CONVERSATION_SIGNAL_CACHE_TTL', default=60 * 60 * 2, cast=int)
+
+# Run chat product discovery (Qloo mapping + Amazon search) in Celery instead of the request
+CHAT_ASYNC_PRODUCT_SEARCH = config('CHAT_ASYNC_PRODUCT_SEARCH', default=True, cast=bool)
 
 # Cache
 CACHES = {
@@ -3,12 +3,14 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from . import views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('api.urls')),
     path('api/chat/', include('chat.urls')),
     path('api/products/', include('products.urls')),
+    path('api/cache-stats/', views.cache_stats, name='cache-stats'),
 ]
 
 if settings.DEBUG:
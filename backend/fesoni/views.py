@@ -0,0 +1,19 @@
+# fesoni/views.py
+import os
+
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .caching import get_cache_stats
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """Hit/miss counters of the caches in the web process that served this request"""
+    return Response({
+        'pid': os.getpid(),
+        'caches': get_cache_stats()
+    }, status=status.HTTP_200_OK)
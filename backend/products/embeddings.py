@@ -0,0 +1,232 @@
+# products/embeddings.py
+"""
+Text embeddings for matching cultural signals to products beyond literal keyword hits.
+
+Texts are encoded on CPU, in batches, by either a sentence-transformers model
+(when PRODUCT_EMBEDDING_MODEL names one and the package is installed) or a
+dependency-free hashed character n-gram encoder. Catalog embeddings are built
+offline into a memory-mapped NumPy store and searched by brute-force top-k.
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from .scoring import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingEncoder:
+    """
+    Signed feature hashing of words and their character n-grams into a fixed
+    number of dimensions, L2-normalized. Shared n-grams make morphological
+    variants ("minimal", "minimalist") and compound words ("cottagecore",
+    "cottage") similar; it has no notion of meaning beyond spelling.
+    """
+
+    def __init__(self, dim: int = 512, ngram_range: Tuple[int, int] = (3, 5)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.signature = f"hashing-{dim}-{ngram_range[0]}-{ngram_range[1]}"
+        self._bucket = lru_cache(maxsize=200_000)(self._hash_feature)
+
+    def encode(self, texts: Iterable[str]) -> np.ndarray:
+        texts = list(texts)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            buckets = [self._bucket(feature) for feature in self._features(text)]
+            if buckets:
+                indices, signs = zip(*buckets)
+                vectors[row] = np.bincount(indices, weights=signs, minlength=self.dim)
+
+        return _normalize_rows(vectors)
+
+    def _features(self, text: str) -> Iterable[str]:
+        low, high = self.ngram_range
+        for word in _WORD_RE.findall((text or '').lower()):
+            yield f"w:{word}"
+            padded = f"<{word}>"
+            for size in range(low, min(high, len(padded)) + 1):
+                for start in range(len(padded) - size + 1):
+                    yield padded[start:start + size]
+
+    def _hash_feature(self, feature: str) -> Tuple[int, float]:
+        digest = zlib.crc32(feature.encode('utf-8'))
+        return digest % self.dim, (1.0 if digest & 0x80000000 else -1.0)
+
+
+class SentenceTransformerEncoder:
+    """A local sentence-transformers model run on CPU"""
+
+    def __init__(self, model_name: str, batch_size: int = 64):
+        # Optional dependency, only imported when a model is configured
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model_name, device='cpu')
+        self.batch_size = batch_size
+        self.dim = self._model.get_sentence_embedding_dimension()
+        self.signature = f"sentence-transformers-{model_name}"
+
+    def encode(self, texts: Iterable[str]) -> np.ndarray:
+        vectors = self._model.encode(
+            list(texts),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return vectors.astype(np.float32, copy=False)
+
+
+class VectorStore:
+    """
+    Row-normalized vectors with integer ids, loaded memory-mapped so workers share
+    the pages instead of each holding a copy.
+    
+    Each build is a version directory ``<name>.<version>/`` holding ``vectors.npy``,
+    ``ids.npy`` and ``meta.json`` (encoder signature); ``<name>`` is a symlink to
+    the current version. A rebuild is swapped in by renaming a new symlink over
+    it, so readers always see the files of a single build.
+    """
+
+    def __init__(self, ids: np.ndarray, vectors: np.ndarray, signature: str):
+        self.ids = ids
+        self.vectors = vectors
+        self.signature = signature
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query: np.ndarray, k: int, min_score: float = -1.0) -> List[Tuple[int, float]]:
+        """(id, cosine similarity) of the k nearest vectors, best first"""
+        if not len(self) or k <= 0:
+            return []
+        scores = self.vectors @ query
+        return [
+            (int(self.ids[index]), float(scores[index]))
+            for index in top_k_indices(scores, k)
+            if scores[index] >= min_score
+        ]
+
+    @classmethod
+    def load(cls, path: str) -> Optional['VectorStore']:
+        """Load the version directory at ``path``"""
+        try:
+            with open(os.path.join(path, 'meta.json')) as meta_file:
+                meta = json.load(meta_file)
+            vectors = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r')
+            ids = np.load(os.path.join(path, 'ids.npy'), mmap_mode='r')
+        except FileNotFoundError:
+            return None
+        return cls(ids, vectors, meta['signature'])
+
+    @staticmethod
+    def save(directory: str, name: str, ids: np.ndarray, vectors: np.ndarray, signature: str) -> str:
+        """Write a new version of the store, make it current and return its directory name"""
+        version = f"{name}.{time.time_ns()}"
+        staging = os.path.join(directory, f"{version}.tmp")
+        os.makedirs(staging)
+        np.save(os.path.join(staging, 'vectors.npy'), np.ascontiguousarray(vectors, dtype=np.float32))
+        np.save(os.path.join(staging, 'ids.npy'), np.asarray(ids, dtype=np.int64))
+        with open(os.path.join(staging, 'meta.json'), 'w') as meta_file:
+            json.dump({'signature': signature, 'count': len(ids), 'dim': int(vectors.shape[1])}, meta_file)
+        os.rename(staging, os.path.join(directory, version))
+
+        link = os.path.join(directory, name)
+        previous = os.readlink(link) if os.path.islink(link) else None
+        if os.path.lexists(f"{link}.tmp"):
+            os.remove(f"{link}.tmp")
+        os.symlink(version, f"{link}.tmp")
+        os.replace(f"{link}.tmp", link)
+
+        # The previous build stays for readers that resolved the link just before the swap
+        for entry in os.listdir(directory):
+            if entry.startswith(f"{name}.") and entry not in (version, previous) and not entry.endswith('.tmp'):
+                shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+        return version
+
+
+_encoder = None
+_encoder_lock = threading.Lock()
+_stores: Dict[str, Tuple[str, Optional[VectorStore]]] = {}
+_stores_lock = threading.Lock()
+
+
+def get_encoder():
+    """The configured encoder, created once per process"""
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                _encoder = _create_encoder()
+    return _encoder
+
+
+def _create_encoder():
+    model_name = settings.PRODUCT_EMBEDDING_MODEL
+    if model_name:
+        try:
+            return SentenceTransformerEncoder(model_name, settings.PRODUCT_EMBEDDING_BATCH_SIZE)
+        except Exception as e:
+            logger.warning(f"Embedding model {model_name} unavailable, using hashed n-grams: {e}")
+    return HashingEncoder(settings.PRODUCT_EMBEDDING_DIM)
+
+
+def get_vector_store(name: str) -> Optional[VectorStore]:
+    """
+    The named store from PRODUCT_EMBEDDING_DIR, reloaded when a rebuild is swapped in.
+    Stores built with a different encoder are ignored.
+    """
+    directory = settings.PRODUCT_EMBEDDING_DIR
+    try:
+        version = os.readlink(os.path.join(directory, name))
+    except OSError:
+        return None
+
+    with _stores_lock:
+        loaded = _stores.get(name)
+        if loaded is None or loaded[0] != version:
+            store = VectorStore.load(os.path.join(directory, version))
+            if store is not None and store.signature != get_encoder().signature:
+                logger.warning(f"Ignoring embedding store {name}: built with {store.signature}")
+                store = None
+            loaded = (version, store)
+            _stores[name] = loaded
+    return loaded[1]
+
+
+def similarity(query: str, texts: List[str]) -> np.ndarray:
+    """Cosine similarity of each text to the query, floored at 0, in one batch"""
+    if not texts:
+        return np.zeros(0)
+    vectors = get_encoder().encode([query] + texts)
+    return np.maximum(vectors[1:] @ vectors[0], 0.0).astype(np.float64)
+
+
+def product_text(title: str, details: Optional[Dict] = None) -> str:
+    """Text embedded for a catalog product"""
+    details = details or {}
+    parts = [title]
+    parts.extend(str(category) for category in details.get('categories', []))
+    parts.extend(str(feature) for feature in details.get('features', [])[:10])
+    parts.append(details.get('product_description', '')[:1000])
+    return ' '.join(part for part in parts if part)
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
@@ -0,0 +1,40 @@
+# products/management/commands/build_product_embeddings.py
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products import embeddings
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Embed every catalog product and write the memory-mapped store used for semantic retrieval"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.PRODUCT_EMBEDDING_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        encoder = embeddings.get_encoder()
+
+        ids, chunks, batch_ids, batch_texts = [], [], [], []
+        products = Product.objects.order_by('id').values_list('id', 'title', 'details')
+        for pk, title, details in products.iterator(chunk_size=batch_size * 10):
+            batch_ids.append(pk)
+            batch_texts.append(embeddings.product_text(title, details))
+            if len(batch_ids) == batch_size:
+                ids.extend(batch_ids)
+                chunks.append(encoder.encode(batch_texts))
+                batch_ids, batch_texts = [], []
+
+        if batch_ids:
+            ids.extend(batch_ids)
+            chunks.append(encoder.encode(batch_texts))
+
+        vectors = np.vstack(chunks) if chunks else np.zeros((0, encoder.dim), dtype=np.float32)
+        embeddings.VectorStore.save(
+            settings.PRODUCT_EMBEDDING_DIR, 'products', np.array(ids, dtype=np.int64), vectors, encoder.signature
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Embedded {len(ids)} products with {encoder.signature} into {settings.PRODUCT_EMBEDDING_DIR}"
+        ))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_alter_productrecommendation_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productsearch',
+            index=models.Index(fields=['user', '-search_timestamp', '-id'], name='prod_search_user_ts_id_idx'),
+        ),
+    ]
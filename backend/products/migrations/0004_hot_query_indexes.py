@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productrecommendation',
+            index=models.Index(fields=['search', '-cultural_match_score'], name='prod_rec_search_score_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('retailer', models.CharField(max_length=50)),
+                ('product_id', models.CharField(max_length=100)),
+                ('title', models.CharField(max_length=500)),
+                ('url', models.URLField()),
+                ('image', models.URLField(blank=True, null=True)),
+                ('price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('retail_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('rating', models.FloatField(blank=True, null=True)),
+                ('reviews_count', models.IntegerField(blank=True, null=True)),
+                ('prime', models.BooleanField(default=False)),
+                ('details', models.JSONField(blank=True, default=dict, help_text='Latest formatted product details response')),
+                ('search_refreshed_at', models.DateTimeField(blank=True, null=True)),
+                ('details_refreshed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('retailer', 'product_id'), name='prod_product_retailer_pid_uniq')],
+            },
+        ),
+        migrations.AddField(
+            model_name='productrecommendation',
+            name='catalog_product',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='recommendations', to='products.product'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:20
+
+from django.db import migrations
+from django.db.models import Exists, OuterRef, Q, Subquery
+
+
+def backfill_catalog(apps, schema_editor):
+    """Create a catalog product per (retailer, product_id) from its latest recommendation and link every recommendation"""
+    Product = apps.get_model('products', 'Product')
+    ProductRecommendation = apps.get_model('products', 'ProductRecommendation')
+
+    # The latest recommendation per product is the one no other recommendation of it comes after
+    newer = ProductRecommendation.objects.filter(
+        retailer=OuterRef('retailer'),
+        product_id=OuterRef('product_id'),
+    ).filter(
+        Q(created_at__gt=OuterRef('created_at')) | Q(created_at=OuterRef('created_at'), id__gt=OuterRef('id'))
+    )
+    latest = ProductRecommendation.objects.filter(~Exists(newer)).values_list(
+        'retailer', 'product_id', 'product_title', 'product_url', 'product_image', 'price'
+    )
+
+    batch = []
+    for retailer, product_id, title, url, image, price in latest.iterator(chunk_size=1000):
+        batch.append(Product(retailer=retailer, product_id=product_id, title=title, url=url, image=image, price=price))
+        if len(batch) == 1000:
+            Product.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        Product.objects.bulk_create(batch, ignore_conflicts=True)
+
+    ProductRecommendation.objects.update(catalog_product=Subquery(
+        Product.objects.filter(retailer=OuterRef('retailer'), product_id=OuterRef('product_id')).values('id')[:1]
+    ))
+
+
+def restore_denormalized_fields(apps, schema_editor):
+    """Copy catalog title, URL and image back onto recommendations"""
+    Product = apps.get_model('products', 'Product')
+    ProductRecommendation = apps.get_model('products', 'ProductRecommendation')
+
+    catalog_product = Product.objects.filter(pk=OuterRef('catalog_product'))
+    ProductRecommendation.objects.filter(catalog_product__isnull=False).update(
+        product_title=Subquery(catalog_product.values('title')[:1]),
+        product_url=Subquery(catalog_product.values('url')[:1]),
+        product_image=Subquery(catalog_product.values('image')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_catalog'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_catalog, restore_denormalized_fields),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_backfill_product_catalog'),
+    ]
+
+    operations = [
+        # Defaults only matter when migrating backwards, so the re-added columns can be filled
+        migrations.AlterField(
+            model_name='productrecommendation',
+            name='product_title',
+            field=models.CharField(default='', max_length=500),
+        ),
+        migrations.AlterField(
+            model_name='productrecommendation',
+            name='product_url',
+            field=models.URLField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='productrecommendation',
+            name='product_title',
+        ),
+        migrations.RemoveField(
+            model_name='productrecommendation',
+            name='product_url',
+        ),
+        migrations.RemoveField(
+            model_name='productrecommendation',
+            name='product_image',
+        ),
+        migrations.AlterField(
+            model_name='productrecommendation',
+            name='catalog_product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='recommendations', to='products.product'),
+        ),
+    ]
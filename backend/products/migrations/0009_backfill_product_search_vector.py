@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:05
+
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models.fields.json import KT
+
+
+def index_catalog(apps, schema_editor):
+    """Build the full-text document for every existing catalog product"""
+    Product = apps.get_model('products', 'Product')
+    Product.objects.update(search_vector=(
+        SearchVector('title', weight='A', config='english') +
+        SearchVector(KT('details__categories'), KT('details__features'), weight='B', config='english') +
+        SearchVector(KT('details__product_description'), weight='C', config='english')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_catalog, migrations.RunPython.noop),
+    ]
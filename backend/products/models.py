@@ -1,8 +1,40 @@
 # products/models.py
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
+class Product(models.Model):
+    """Catalog entry shared by every recommendation and save of the same retailer product"""
+    retailer = models.CharField(max_length=50)  # 'amazon' or 'walmart'
+    product_id = models.CharField(max_length=100)
+    title = models.CharField(max_length=500)
+    url = models.URLField()
+    image = models.URLField(null=True, blank=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    retail_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    rating = models.FloatField(null=True, blank=True)
+    reviews_count = models.IntegerField(null=True, blank=True)
+    prime = models.BooleanField(default=False)
+    details = models.JSONField(default=dict, blank=True, help_text="Latest formatted product details response")
+    search_refreshed_at = models.DateTimeField(null=True, blank=True)
+    details_refreshed_at = models.DateTimeField(null=True, blank=True)
+    search_vector = SearchVectorField(null=True, editable=False, help_text="Full-text index over title, categories, features and description")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['retailer', 'product_id'], name='prod_product_retailer_pid_uniq'),
+        ]
+        indexes = [
+            GinIndex(fields=['search_vector'], name='prod_product_search_gin_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} - {self.retailer}"
+
+
 class ProductSearch(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     search_query = models.TextField()
@@ -13,6 +45,9 @@ class ProductSearch(models.Model):
 
     class Meta:
         ordering = ['-search_timestamp']
+        indexes = [
+            models.Index(fields=['user', '-search_timestamp', '-id'], name='prod_search_user_ts_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.search_query[:50]}"
@@ -20,10 +55,8 @@ class ProductSearch(models.Model):
 
 class ProductRecommendation(models.Model):
     search = models.ForeignKey(ProductSearch, on_delete=models.CASCADE, related_name='recommendations')
+    catalog_product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name='recommendations')
     product_id = models.CharField(max_length=100)
-    product_title = models.CharField(max_length=500)
-    product_url = models.URLField()
-    product_image = models.URLField(null=True, blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     retailer = models.CharField(max_length=50)  # 'amazon' or 'walmart'
     cultural_match_score = models.FloatField(default=0.0, help_text="Score based on Qloo's cultural alignment")
@@ -35,7 +68,8 @@ class ProductRecommendation(models.Model):
         indexes = [
             models.Index(fields=['cultural_match_score']),
             models.Index(fields=['product_id']),
+            models.Index(fields=['search', '-cultural_match_score'], name='prod_rec_search_score_idx'),
         ]
 
     def __str__(self):
-        return f"{self.product_title} - {self.retailer}"
\ No newline at end of file
+        return f"{self.catalog_product.title} - {self.retailer}"
\ No newline at end of file
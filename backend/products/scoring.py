@@ -0,0 +1,201 @@
+# products/scoring.py
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+import numpy as np
+
+# Per-category scoring: (weight per matching keyword, cap on the category's contribution)
+CATEGORY_WEIGHTS = {
+    'insights': (0.25, 0.6),  # Qloo insights contribute up to 60% of score
+    'aesthetics': (0.1, 0.2),
+    'styles': (0.05, 0.1),
+    'moods': (0.05, 0.1),
+}
+
+
+class KeywordMatcher:
+    """
+    Finds which of a set of keywords occur as substrings of a text in one scan.
+
+    All keywords are compiled into a single regex that reports the longest keyword
+    starting at each position. Every keyword contained in a matched keyword is
+    implied by it, so the union of those closures is exactly the set of keywords
+    ``k`` for which ``k in text`` holds - including overlapping and nested ones.
+    The regex follows a trie of the keywords, so scanning cost depends on the
+    text and keyword lengths rather than on how many keywords there are.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        patterns = set(keywords)
+        # '' is a substring of every text, as with the `in` operator
+        self._always: FrozenSet[str] = frozenset({''} & patterns)
+        patterns.discard('')
+
+        trie = _build_trie(patterns)
+        self._regex = re.compile('(?=(' + _trie_regex(trie) + '))') if patterns else None
+        self._implied: Dict[str, FrozenSet[str]] = {
+            pattern: frozenset(_trie_substrings(trie, pattern)) for pattern in patterns
+        }
+        self._total = len(patterns)
+
+    def find(self, text: str) -> Set[str]:
+        found = set(self._always)
+        if self._regex is None or not text:
+            return found
+
+        matched = set()
+        for match in self._regex.finditer(text):
+            pattern = match.group(1)
+            if pattern not in matched:
+                matched.add(pattern)
+                found |= self._implied[pattern]
+                if len(found) - len(self._always) == self._total:
+                    break
+        return found
+
+
+_TERMINAL = ''
+
+
+def _build_trie(patterns: Iterable[str]) -> Dict:
+    trie: Dict = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            node = node.setdefault(char, {})
+        node[_TERMINAL] = True
+    return trie
+
+
+def _trie_regex(trie: Dict) -> str:
+    """
+    Regex matching the longest trie path: greedy optional groups try to extend before stopping.
+    Built bottom-up with an explicit stack, so keyword length is not bounded by the recursion limit.
+    """
+    patterns: Dict[int, str] = {}
+    stack = [(trie, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if not expanded:
+            stack.append((node, True))
+            stack.extend((child, False) for char, child in node.items() if char != _TERMINAL)
+            continue
+
+        branches = [re.escape(char) + patterns.pop(id(child)) for char, child in node.items() if char != _TERMINAL]
+        if not branches:
+            patterns[id(node)] = ''
+            continue
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        patterns[id(node)] = f'(?:{body})?' if _TERMINAL in node else body
+    return patterns[id(trie)]
+
+
+def _trie_substrings(trie: Dict, text: str) -> Set[str]:
+    """Every trie pattern occurring in text"""
+    found = set()
+    for start in range(len(text)):
+        node = trie
+        for end in range(start, len(text)):
+            node = node.get(text[end])
+            if node is None:
+                break
+            if _TERMINAL in node:
+                found.add(text[start:end + 1])
+    return found
+
+
+class CulturalMatcher:
+    """
+    Cultural context compiled once per request for scoring many products.
+
+    Each product's title (and description, when there are Qloo insights to
+    look for) is scanned once for every keyword category together.
+    """
+
+    def __init__(self, cultural_context: Dict, product_mapping: Dict):
+        self.insights = [insight.get('name', '').lower() for insight in product_mapping.get('cultural_insights', [])]
+        self.aesthetics = [keyword.lower() for keyword in cultural_context.get('aesthetic_keywords', [])]
+        self.styles = [pref.lower() for pref in cultural_context.get('style_preferences', [])]
+        self.moods = [mood.lower() for mood in cultural_context.get('mood_descriptors', [])]
+        self._matcher = KeywordMatcher(self.insights + self.aesthetics + self.styles + self.moods)
+
+    def count_matches(self, product: Dict) -> Dict[str, int]:
+        """Number of keywords per category found in the product (duplicates count, as listed)"""
+        title_hits = self._matcher.find(product['title'].lower())
+        description = product.get('product_description', '').lower()
+        description_hits = self._matcher.find(description) if self.insights else set()
+
+        return {
+            'insights': sum(1 for name in self.insights if name in title_hits or name in description_hits),
+            'aesthetics': sum(1 for keyword in self.aesthetics if keyword in title_hits),
+            'styles': sum(1 for pref in self.styles if pref in title_hits),
+            'moods': sum(1 for mood in self.moods if mood in title_hits),
+        }
+
+
+def score_products_batch(products: List[Dict], cultural_context: Dict, product_mapping: Dict,
+                         matcher: Optional[CulturalMatcher] = None) -> np.ndarray:
+    """
+    Cultural match scores for all candidates at once.
+
+    Builds per-category hit counts and the rating/reviews/prime/price columns as
+    arrays and applies the weighted caps column-wise. The operations and their
+    order match scoring each product on its own (per category in
+    CATEGORY_WEIGHTS order, then rating, reviews, prime and discount), so the
+    scores are bit-for-bit identical; products/tests.py checks this.
+    """
+    if matcher is None:
+        matcher = CulturalMatcher(cultural_context, product_mapping)
+
+    count = len(products)
+    categories = list(CATEGORY_WEIGHTS)
+    hits = np.zeros((count, len(categories)), dtype=np.int64)
+    ratings = np.empty(count)
+    review_counts = np.empty(count)
+    prime = np.empty(count, dtype=bool)
+    retail_prices = np.empty(count)
+    prices = np.empty(count)
+
+    for row, product in enumerate(products):
+        matches = matcher.count_matches(product)
+        hits[row] = [matches[category] for category in categories]
+        ratings[row] = product.get('rating', 0)
+        review_counts[row] = product.get('reviews', 0)
+        prime[row] = bool(product.get('prime', False))
+        retail_prices[row] = product.get('retail_price', 0)
+        prices[row] = product.get('price', 0)
+
+    scores = np.zeros(count)
+    for column, category in enumerate(categories):
+        weight, cap = CATEGORY_WEIGHTS[category]
+        scores += np.minimum(hits[:, column] * weight, cap)
+
+    scores += np.where(ratings > 4.5, 0.05, np.where(ratings > 4.0, 0.03, 0.0))
+    scores += np.where(review_counts > 1000, 0.02, np.where(review_counts > 100, 0.01, 0.0))
+    scores += np.where(prime, 0.02, 0.0)
+
+    discounted = (retail_prices > 0) & (prices > 0) & (prices < retail_prices)
+    discount_ratio = np.divide(retail_prices - prices, retail_prices,
+                               out=np.zeros(count), where=discounted)
+    scores += np.where(discounted, np.minimum(discount_ratio * 0.05, 0.02), 0.0)
+
+    return np.minimum(scores, 1.0)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the ``k`` best scores, best first, ties in input order - the same
+    ranking as a stable descending sort, without sorting every candidate.
+    """
+    count = len(scores)
+    if k <= 0 or count == 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= count:
+        return np.argsort(-scores, kind='stable')
+
+    threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    chosen = np.concatenate([above, ties])
+    return chosen[np.argsort(-scores[chosen], kind='stable')]
+
@@ -4,6 +4,9 @@ from .models import ProductSearch, ProductRecommendation
 
 
 class ProductRecommendationSerializer(serializers.ModelSerializer):
+    product_title = serializers.CharField(source='catalog_product.title', read_only=True)
+    product_url = serializers.URLField(source='catalog_product.url', read_only=True)
+    product_image = serializers.URLField(source='catalog_product.image', read_only=True)
     qloo_insights_applied = serializers.JSONField(read_only=True, help_text="Qloo Taste AI™ insights used for this recommendation")
 
     class Meta:
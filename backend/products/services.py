@@ -2,15 +2,217 @@
 import os
 import json
 import logging
+import threading
 import requests
-from typing import Dict, List, Any, Optional
+from concurrent.futures import wait
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from functools import reduce
+from operator import or_
+from typing import Dict, List, Any, Optional, Tuple
 from django.conf import settings
-from .models import ProductSearch, ProductRecommendation
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.fields.json import KT
+from django.utils import timezone
+from fesoni import http_client
+from fesoni.executors import DatabaseThreadPoolExecutor
+from fesoni.caching import ReadThroughCache, normalize_text
+from . import embeddings
+from .models import Product, ProductSearch, ProductRecommendation
+from .scoring import KeywordMatcher, score_products_batch, top_k_indices
 
 logger = logging.getLogger(__name__)
 
+# Formatted search results keyed on the normalized keyword set and page; identical in-flight
+# searches in this process share a single upstream request
+amazon_search_cache = ReadThroughCache(
+    'amazon-search',
+    ttl=settings.AMAZON_SEARCH_CACHE_TTL,
+    negative_ttl=settings.AMAZON_SEARCH_NEGATIVE_TTL,
+    coalesce=True
+)
+
+# Formatted product details keyed on ASIN
+amazon_details_cache = ReadThroughCache(
+    'amazon-details',
+    ttl=settings.AMAZON_DETAILS_CACHE_TTL,
+    coalesce=True
+)
+
+# Caps concurrent RapidAPI detail lookups across the process, whoever makes them
+_details_semaphore = threading.BoundedSemaphore(settings.PRODUCT_ENRICH_MAX_CONCURRENCY)
+_details_executor = DatabaseThreadPoolExecutor(
+    max_workers=settings.PRODUCT_ENRICH_MAX_CONCURRENCY, thread_name_prefix='amazon-details'
+)
+
+# Fan-out for multi-query searches; stragglers past the latency budget are left to
+# finish here (and fill the cache) instead of holding up the request
+_search_executor = DatabaseThreadPoolExecutor(
+    max_workers=settings.PRODUCT_SEARCH_MAX_WORKERS, thread_name_prefix='amazon-search'
+)
+
+def catalog_search_vector() -> SearchVector:
+    """Weighted full-text document for a catalog product: title, then categories and features, then description"""
+    return (
+        SearchVector('title', weight='A', config='english') +
+        SearchVector(KT('details__categories'), KT('details__features'), weight='B', config='english') +
+        SearchVector(KT('details__product_description'), weight='C', config='english')
+    )
+
+class ProductCatalogService:
+    """Keeps the Product catalog in step with retailer responses, one row per (retailer, product_id)"""
+    
+    SEARCH_FIELDS = ['title', 'url', 'image', 'price', 'retail_price', 'rating', 'reviews_count', 'prime',
+                     'search_refreshed_at']
+    DETAILS_FIELDS = ['title', 'url', 'image', 'price', 'retail_price', 'rating', 'reviews_count', 'prime',
+                      'details', 'details_refreshed_at']
+    
+    def upsert_search_results(self, products: List[Dict]):
+        """Insert or refresh catalog rows from formatted search results"""
+        now = timezone.now()
+        self._upsert(
+            [Product(**self._catalog_fields(product), search_refreshed_at=now) for product in products],
+            self.SEARCH_FIELDS
+        )
+    
+    def upsert_details(self, detailed_product: Dict):
+        """Insert or refresh a catalog row, keeping the formatted details response"""
+        self._upsert(
+            [Product(**self._catalog_fields(detailed_product), details=detailed_product,
+                     details_refreshed_at=timezone.now())],
+            self.DETAILS_FIELDS
+        )
+    
+    def ensure_products(self, products: List[Dict]) -> Dict[Tuple[str, str], int]:
+        """Catalog ids keyed on (retailer, product_id), adding rows for products not in the catalog yet"""
+        rows = self._dedupe([Product(**self._catalog_fields(product)) for product in products])
+        if not rows:
+            return {}
+        
+        Product.objects.bulk_create(rows, ignore_conflicts=True)
+        
+        catalog = Product.objects.filter(
+            retailer__in={row.retailer for row in rows},
+            product_id__in={row.product_id for row in rows}
+        ).values_list('id', 'retailer', 'product_id')
+        return {(retailer, product_id): pk for pk, retailer, product_id in catalog}
+    
+    def search(self, keywords: List[str], limit: int) -> List[Dict]:
+        """
+        Recently refreshed catalog products matching any keyword, best full-text rank
+        first, formatted like search results. Words within a keyword must all match.
+        """
+        keywords = [keyword for keyword in keywords if keyword]
+        if not keywords or limit <= 0:
+            return []
+        
+        query = reduce(or_, (SearchQuery(keyword, config='english') for keyword in keywords))
+        fresh_since = timezone.now() - timedelta(seconds=settings.PRODUCT_LOCAL_SEARCH_MAX_AGE)
+        
+        products = Product.objects.filter(
+            Q(search_refreshed_at__gte=fresh_since) | Q(details_refreshed_at__gte=fresh_since),
+            search_vector=query
+        ).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', 'id')[:limit]
+        
+        return [self._format_catalog_product(product) for product in products]
+    
+    def get_fresh_products(self, pks: List[int]) -> List[Dict]:
+        """Recently refreshed catalog products by primary key, in the order given, formatted like search results"""
+        if not pks:
+            return []
+        
+        fresh_since = timezone.now() - timedelta(seconds=settings.PRODUCT_LOCAL_SEARCH_MAX_AGE)
+        products = Product.objects.filter(
+            Q(search_refreshed_at__gte=fresh_since) | Q(details_refreshed_at__gte=fresh_since),
+            pk__in=pks
+        ).in_bulk()
+        
+        return [self._format_catalog_product(products[pk]) for pk in pks if pk in products]
+    
+    def get_fresh_details(self, retailer: str, product_id: str) -> Optional[Dict]:
+        """Stored details response if it was refreshed within PRODUCT_CATALOG_DETAILS_MAX_AGE"""
+        fresh_since = timezone.now() - timedelta(seconds=settings.PRODUCT_CATALOG_DETAILS_MAX_AGE)
+        details = Product.objects.filter(
+            retailer=retailer,
+            product_id=product_id,
+            details_refreshed_at__gte=fresh_since
+        ).values_list('details', flat=True).first()
+        return details or None
+    
+    def _upsert(self, rows: List[Product], update_fields: List[str]):
+        rows = self._dedupe(rows)
+        if not rows:
+            return
+        
+        Product.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['retailer', 'product_id'],
+            update_fields=update_fields
+        )
+        # Reindex the touched rows from their stored title and details
+        Product.objects.filter(
+            retailer__in={row.retailer for row in rows},
+            product_id__in={row.product_id for row in rows}
+        ).update(search_vector=catalog_search_vector())
+    
+    def _dedupe(self, rows: List[Product]) -> List[Product]:
+        # A conflicting upsert may only touch each row once per statement; the last response wins
+        unique = {(row.retailer, row.product_id): row for row in rows if row.product_id}
+        # Rows are inserted and locked in list order; one global order keeps concurrent
+        # writes with overlapping products from deadlocking
+        return [unique[key] for key in sorted(unique)]
+    
+    def _catalog_fields(self, product: Dict) -> Dict[str, Any]:
+        reviews_count = product.get('reviews_count', product.get('reviews'))
+        return {
+            'retailer': product.get('retailer', 'amazon'),
+            'product_id': product.get('product_id', ''),
+            'title': (product.get('title') or '')[:500],
+            'url': product.get('url', ''),
+            'image': product.get('image') or None,
+            'price': self._to_decimal(product.get('price')),
+            'retail_price': self._to_decimal(product.get('retail_price')),
+            'rating': product.get('rating'),
+            'reviews_count': reviews_count if isinstance(reviews_count, int) else None,
+            'prime': bool(product.get('prime', False))
+        }
+    
+    def _format_catalog_product(self, product: Product) -> Dict:
+        """Convert a catalog row to the internal search result format"""
+        details = product.details or {}
+        return {
+            "product_id": product.product_id,
+            "title": product.title,
+            "url": product.url,
+            "image": product.image or '',
+            "price": float(product.price) if product.price is not None else 0,
+            "retail_price": float(product.retail_price) if product.retail_price is not None else 0,
+            "rating": product.rating or 0.0,
+            "reviews": product.reviews_count or 0,
+            "prime": product.prime,
+            "product_description": details.get('product_description', ''),
+            "delivery_message": details.get('delivery_message', ''),
+            "variations": [],
+            "retailer": product.retailer,
+            "data_type": "catalog_result"
+        }
+    
+    def _to_decimal(self, value) -> Optional[Decimal]:
+        if value is None or value == '':
+            return None
+        try:
+            return Decimal(str(value)).quantize(Decimal('0.01'))
+        except (InvalidOperation, ValueError):
+            return None
+
 class RapidAPIAmazonService:
     def __init__(self):
+        self.catalog = ProductCatalogService()
         self.api_key = settings.RAPIDAPI_KEY
         self.host = "axesso-axesso-amazon-data-service-v1.p.rapidapi.com"
         self.search_url = f"https://{self.host}/amz/amazon-search-by-keyword-asin"
@@ -20,25 +222,84 @@ class RapidAPIAmazonService:
             'x-rapidapi-key': self.api_key
         }
     
-    def search_products(self, keywords: List[str], max_results: int = 10) -> List[Dict]:
+    def search_products(self, keywords: List[str], max_results: int = 10, page: int = 1) -> List[Dict]:
         """Search Amazon products using RapidAPI, guided by Qloo's cultural insights"""
+        keyword_set = sorted({normalize_text(keyword) for keyword in keywords} - {''})
+        products = amazon_search_cache.get_or_fetch(
+            ("|".join(keyword_set), page),
+            lambda: self._fetch_search_results(keywords, page),
+            default=[]
+        )
+        return products[:max_results]
+    
+    def search_products_multi(self, keyword_groups: List[List[str]], pages: int = 1, max_results: int = 10,
+                              latency_budget: Optional[float] = None) -> List[Dict]:
+        """
+        Run one search per keyword group and page in parallel and merge the results.
+        
+        Results keep the order of the groups, then pages, and are deduplicated by
+        ASIN; results without an ASIN cannot be cataloged or recorded and are
+        skipped. Searches still running when ``latency_budget`` (seconds) runs out
+        are dropped from this response.
+        """
+        queries = [
+            (group, page)
+            for group in keyword_groups if group
+            for page in range(1, pages + 1)
+        ]
+        if not queries:
+            return []
+        
+        futures = [
+            _search_executor.submit(self.search_products, group, max_results, page)
+            for group, page in queries
+        ]
+        done, not_done = wait(futures, timeout=latency_budget)
+        
+        if not_done:
+            for future in not_done:
+                future.cancel()
+            logger.warning(f"Amazon search latency budget exceeded; dropped {len(not_done)} of {len(futures)} queries")
+        
+        merged = []
+        seen_asins = set()
+        for future in futures:
+            if future not in done:
+                continue
+            try:
+                products = future.result()
+            except Exception as e:
+                logger.error(f"Amazon search query failed: {e}")
+                continue
+            
+            for product in products:
+                asin = product.get('product_id')
+                if not asin or asin in seen_asins:
+                    continue
+                seen_asins.add(asin)
+                merged.append(product)
+        
+        return merged
+    
+    def _fetch_search_results(self, keywords: List[str], page: int = 1) -> Optional[List[Dict]]:
+        """Run the RapidAPI keyword search; returns None on failure so errors are not cached"""
         try:
             search_query = " ".join(keywords)
             
             params = {
                 'domainCode': 'com',
                 'keyword': search_query,
-                'page': 1,
+                'page': page,
                 'excludeSponsored': 'false',
                 'sortBy': 'relevanceblender',
                 'withCache': 'true'
             }
             
-            response = requests.get(
+            response = http_client.get(
                 self.search_url,
+                endpoint='rapidapi.search',
                 headers=self.headers,
-                params=params,
-                timeout=10
+                params=params
             )
             
             if response.status_code == 200:
@@ -48,27 +309,28 @@ class RapidAPIAmazonService:
                     products = []
                     search_details = data.get('searchProductDetails', [])
                     
-                    for product_detail in search_details[:max_results]:
+                    for product_detail in search_details:
                         formatted_product = self._format_search_product(product_detail)
                         products.append(formatted_product)
                     
+                    self._update_catalog(self.catalog.upsert_search_results, products)
                     return products
                 else:
                     logger.warning(f"No products found for keywords: {keywords}")
                     return []
             else:
                 logger.error(f"RapidAPI search request failed with status {response.status_code}: {response.text}")
-                return []
+                return None
                 
         except requests.exceptions.Timeout:
             logger.error("RapidAPI search request timed out")
-            return []
+            return None
         except requests.exceptions.RequestException as e:
             logger.error(f"RapidAPI search request failed: {e}")
-            return []
+            return None
         except Exception as e:
             logger.error(f"Unexpected error in RapidAPI search: {e}")
-            return []
+            return None
     
     def get_product_details(self, product_url: str) -> Optional[Dict]:
         """Get detailed Amazon product information for Qloo-driven recommendations"""
@@ -77,11 +339,11 @@ class RapidAPIAmazonService:
                 'url': product_url
             }
             
-            response = requests.get(
+            response = http_client.get(
                 self.details_url,
+                endpoint='rapidapi.details',
                 headers=self.headers,
-                params=params,
-                timeout=15
+                params=params
             )
             
             if response.status_code == 200:
@@ -108,8 +370,40 @@ class RapidAPIAmazonService:
     
     def get_product_details_by_asin(self, asin: str) -> Optional[Dict]:
         """Get product details by ASIN for Qloo-enhanced recommendations"""
+        asin = asin.strip().upper()
+        if not asin:
+            return None
+        
+        return amazon_details_cache.get_or_fetch(
+            (asin,),
+            lambda: self._fetch_product_details_by_asin(asin),
+            default=None
+        )
+    
+    def _fetch_product_details_by_asin(self, asin: str) -> Optional[Dict]:
+        """Serve recently refreshed details from the catalog, else fetch them upstream"""
+        try:
+            stored_details = self.catalog.get_fresh_details('amazon', asin)
+            if stored_details:
+                return stored_details
+        except Exception as e:
+            logger.error(f"Error reading product catalog for {asin}: {e}")
+        
+        # Upstream lookups hold a slot of the process-wide limit
         amazon_url = f"https://www.amazon.com/dp/{asin}/"
-        return self.get_product_details(amazon_url)
+        with _details_semaphore:
+            detailed_product = self.get_product_details(amazon_url)
+        
+        if detailed_product:
+            self._update_catalog(self.catalog.upsert_details, detailed_product)
+        return detailed_product
+    
+    def _update_catalog(self, upsert, data):
+        """Catalog writes never fail the lookup that produced the data"""
+        try:
+            upsert(data)
+        except Exception as e:
+            logger.error(f"Error updating product catalog: {e}")
     
     def _format_search_product(self, product_detail: Dict) -> Dict:
         """Convert RapidAPI search product format to internal format"""
@@ -230,6 +524,7 @@ class RapidAPIAmazonService:
 class ProductService:
     def __init__(self):
         self.amazon_service = RapidAPIAmazonService()
+        self.catalog = ProductCatalogService()
     
     def search_products(self, cultural_context: Dict, product_mapping: Dict) -> List[Dict]:
         """Search products using Qloo's cultural insights as the primary recommendation engine"""
@@ -240,28 +535,184 @@ class ProductService:
                 logger.warning("No keywords extracted from Qloo's cultural insights")
                 return []
             
-            amazon_products = self.amazon_service.search_products(keywords, max_results=15)
-            
-            scored_products = []
-            
-            for product in amazon_products:
-                cultural_score = self._calculate_cultural_match_score(
-                    product, cultural_context, product_mapping
+            # Products we have already seen answer most queries without calling RapidAPI
+            candidates = self._search_catalog(keywords)
+            seen_ids = {product['product_id'] for product in candidates}
+            candidates += [
+                product for product in self._search_embeddings(keywords)
+                if product['product_id'] not in seen_ids
+            ]
+            
+            if len(candidates) < settings.PRODUCT_LOCAL_SEARCH_MIN_RESULTS:
+                # Several short queries recall better than one long one; they run in parallel
+                amazon_products = self.amazon_service.search_products_multi(
+                    self._group_search_keywords(keywords),
+                    pages=settings.PRODUCT_SEARCH_PAGES,
+                    max_results=settings.PRODUCT_SEARCH_CANDIDATES,
+                    latency_budget=settings.PRODUCT_SEARCH_LATENCY_BUDGET
                 )
-                scored_products.append({
-                    **product,
-                    'cultural_match_score': cultural_score,
-                    'qloo_insights': product_mapping.get('cultural_insights', [])
-                })
-            
-            scored_products.sort(key=lambda x: x['cultural_match_score'], reverse=True)
-            
-            return scored_products[:12]
+                
+                # Fresh upstream data wins over the catalog copy of the same product
+                upstream_ids = {product['product_id'] for product in amazon_products}
+                candidates = amazon_products + [
+                    product for product in candidates if product['product_id'] not in upstream_ids
+                ]
+            
+            return self.rank_products(
+                candidates, cultural_context, product_mapping, settings.PRODUCT_SEARCH_RESULTS
+            )
         
         except Exception as e:
             logger.error(f"Error searching products with Qloo insights: {e}")
             return []
     
+    def _search_catalog(self, keywords: List[str]) -> List[Dict]:
+        """Local full-text candidates; an unavailable index just means going upstream"""
+        if not settings.PRODUCT_LOCAL_SEARCH_ENABLED:
+            return []
+        
+        try:
+            return self.catalog.search(keywords, settings.PRODUCT_LOCAL_SEARCH_LIMIT)
+        except Exception as e:
+            logger.error(f"Error searching product catalog: {e}")
+            return []
+    
+    def _search_embeddings(self, keywords: List[str]) -> List[Dict]:
+        """Catalog products nearest to the keywords in the prebuilt embedding store"""
+        if settings.PRODUCT_EMBEDDING_CANDIDATES <= 0:
+            return []
+        
+        try:
+            store = embeddings.get_vector_store('products')
+            if store is None:
+                return []
+            
+            query = embeddings.get_encoder().encode([" ".join(keywords)])[0]
+            nearest = store.search(
+                query, settings.PRODUCT_EMBEDDING_CANDIDATES, settings.PRODUCT_EMBEDDING_MIN_SIMILARITY
+            )
+            return self.catalog.get_fresh_products([pk for pk, _ in nearest])
+        except Exception as e:
+            logger.error(f"Error searching product embeddings: {e}")
+            return []
+    
+    def rank_products(self, products: List[Dict], cultural_context: Dict, product_mapping: Dict,
+                      top_k: int) -> List[Dict]:
+        """Score all candidates in one vectorized pass and return the top_k, best first"""
+        scores = score_products_batch(products, cultural_context, product_mapping)
+        
+        # Blend in semantic similarity so related wording counts, not just literal keyword hits
+        weight = settings.PRODUCT_EMBEDDING_WEIGHT
+        if weight > 0 and products:
+            try:
+                query = " ".join(self._extract_search_keywords(cultural_context, product_mapping))
+                similarities = embeddings.similarity(query, [
+                    embeddings.product_text(product.get('title', ''), product) for product in products
+                ])
+                scores = (1 - weight) * scores + weight * similarities
+            except Exception as e:
+                logger.error(f"Error computing semantic similarity: {e}")
+        
+        return [
+            {
+                **products[index],
+                'cultural_match_score': float(scores[index]),
+                'qloo_insights': product_mapping.get('cultural_insights', [])
+            }
+            for index in top_k_indices(scores, top_k)
+        ]
+    
+    def record_search(self, user_id: int, search_query: str, cultural_context: Dict, qloo_data: Dict,
+                      products: List[Dict]) -> ProductSearch:
+        """Persist a search and the products served for it in one transaction"""
+        with transaction.atomic():
+            catalog_ids = self.catalog.ensure_products(products)
+            # Products the catalog could not take (no product id) are served but not recorded
+            recorded = []
+            for product in products:
+                catalog_product_id = catalog_ids.get((product.get('retailer'), product.get('product_id')))
+                if catalog_product_id is not None:
+                    recorded.append((catalog_product_id, product))
+            
+            search_obj = ProductSearch.objects.create(
+                user_id=user_id,
+                search_query=search_query,
+                cultural_context=cultural_context,
+                qloo_insights=qloo_data.get('cultural_insights', []),
+                cultural_trends=qloo_data.get('cultural_trends', [])
+            )
+            
+            ProductRecommendation.objects.bulk_create([
+                ProductRecommendation(
+                    search=search_obj,
+                    catalog_product_id=catalog_product_id,
+                    product_id=product['product_id'],
+                    price=product.get('price'),
+                    retailer=product['retailer'],
+                    cultural_match_score=product['cultural_match_score'],
+                    qloo_insights_applied=product.get('qloo_insights', [])
+                )
+                for catalog_product_id, product in recorded
+            ])
+        
+        return search_obj
+    
+    def enrich_products(self, products: List[Dict], cultural_context: Dict, product_mapping: Dict,
+                        top_k: int, latency_budget: Optional[float] = None) -> List[Dict]:
+        """
+        Fetch details for the top_k scored products concurrently and rerank them.
+        
+        Each enriched product gains the detail fields it lacked and a
+        ``cultural_analysis``. Enriched products are reordered by a blend of their
+        search score and the analysis' fit score. Products whose details fail or
+        miss the latency budget have no fit score on that scale, so they follow the
+        enriched ones in search order, and products past top_k follow unchanged.
+        """
+        head, tail = products[:top_k], products[top_k:]
+        if not head:
+            return products
+        
+        futures = [
+            _details_executor.submit(self.amazon_service.get_product_details_by_asin, product.get('product_id', ''))
+            for product in head
+        ]
+        done, not_done = wait(futures, timeout=latency_budget)
+        
+        if not_done:
+            for future in not_done:
+                future.cancel()
+            logger.warning(f"Product enrichment latency budget exceeded; {len(not_done)} of {len(futures)} left unenriched")
+        
+        analysis_context = {**cultural_context, 'qloo_mapping': product_mapping}
+        fit_weight = settings.PRODUCT_ENRICH_FIT_WEIGHT
+        
+        ranked = []
+        unenriched = []
+        for product, future in zip(head, futures):
+            detailed_product = None
+            if future in done:
+                try:
+                    detailed_product = future.result()
+                except Exception as e:
+                    logger.error(f"Error enriching product {product.get('product_id')}: {e}")
+            
+            if not detailed_product:
+                unenriched.append(product)
+                continue
+            
+            search_score = product.get('cultural_match_score', 0.0)
+            cultural_analysis = self._analyze_product_cultural_fit(detailed_product, analysis_context)
+            rank_score = (1 - fit_weight) * search_score + fit_weight * cultural_analysis['overall_fit_score']
+            ranked.append((rank_score, {
+                **{key: value for key, value in detailed_product.items() if key not in product},
+                **product,
+                'cultural_analysis': cultural_analysis
+            }))
+        
+        ranked.sort(key=lambda x: x[0], reverse=True)
+        
+        return [product for _, product in ranked] + unenriched + tail
+    
     def get_enhanced_product_details(self, product_id: str, cultural_context: Dict = None) -> Optional[Dict]:
         """Get enhanced product details with Qloo-powered cultural analysis"""
         try:
@@ -298,17 +749,31 @@ class ProductService:
             features = product.get('features', [])
             
             aesthetic_keywords = cultural_context.get('aesthetic_keywords', [])
+            style_preferences = cultural_context.get('style_preferences', [])
+            qloo_insights = cultural_context.get('qloo_mapping', {}).get('cultural_insights', [])
+            insight_names = [insight.get('name', '').lower() for insight in qloo_insights]
+            
+            # One matcher over every keyword; each text field is scanned once
+            matcher = KeywordMatcher(
+                [keyword.lower() for keyword in aesthetic_keywords] +
+                [pref.lower() for pref in style_preferences] +
+                insight_names
+            )
+            title_hits = matcher.find(title)
+            description_hits = matcher.find(description)
+            feature_hits = set()
+            for feature in features:
+                feature_hits |= matcher.find(feature.lower())
+            
             found_keywords = []
             
             for keyword in aesthetic_keywords:
                 keyword_lower = keyword.lower()
-                if keyword_lower in title or keyword_lower in description:
+                if keyword_lower in title_hits or keyword_lower in description_hits:
                     found_keywords.append(keyword)
                 
-                for feature in features:
-                    if keyword_lower in feature.lower():
-                        found_keywords.append(keyword)
-                        break
+                if keyword_lower in feature_hits:
+                    found_keywords.append(keyword)
             
             analysis['cultural_keywords_found'] = list(set(found_keywords))
             
@@ -316,8 +781,8 @@ class ProductService:
             relevant_aspects = []
             
             for aspect in feature_aspects:
-                aspect_name = aspect.get('name', '').lower()
-                if any(pref.lower() in aspect_name for pref in cultural_context.get('style_preferences', [])):
+                aspect_hits = matcher.find(aspect.get('name', '').lower())
+                if any(pref.lower() in aspect_hits for pref in style_preferences):
                     relevant_aspects.append({
                         'aspect': aspect.get('name'),
                         'sentiment': aspect.get('sentiment'),
@@ -329,11 +794,9 @@ class ProductService:
             analysis['feature_matches'] = relevant_aspects
             
             # Prioritize Qloo's cultural insights for scoring
-            qloo_insights = cultural_context.get('qloo_mapping', {}).get('cultural_insights', [])
             insight_score = 0.0
-            for insight in qloo_insights:
-                insight_name = insight.get('name', '').lower()
-                if insight_name in title or insight_name in description:
+            for insight_name in insight_names:
+                if insight_name in title_hits or insight_name in description_hits:
                     insight_score += 0.2
             
             keyword_score = min(len(found_keywords) * 0.1, 0.3)
@@ -347,9 +810,9 @@ class ProductService:
             total_cultural_mentions = 0
             
             for review in reviews:
-                review_text = review.get('text', '').lower()
+                review_hits = matcher.find(review.get('text', '').lower())
                 for keyword in aesthetic_keywords:
-                    if keyword.lower() in review_text:
+                    if keyword.lower() in review_hits:
                         total_cultural_mentions += 1
                         rating = review.get('rating', '')
                         if '5.0' in rating or '4.0' in rating:
@@ -382,61 +845,15 @@ class ProductService:
         keywords.extend(product_mapping.get('product_categories', []))
         
         keywords = [kw.strip().lower() for kw in keywords if kw.strip()]
-        keywords = list(set(keywords))
+        keywords = list(dict.fromkeys(keywords))
         
         return keywords[:8]
     
-    def _calculate_cultural_match_score(self, product: Dict, cultural_context: Dict, product_mapping: Dict) -> float:
-        """Calculate cultural match score with Qloo's Taste AI™ as the primary driver"""
-        score = 0.0
-        
-        # Prioritize Qloo's cultural insights
-        qloo_insights = product_mapping.get('cultural_insights', [])
-        insight_score = 0.0
-        title_lower = product['title'].lower()
-        description = product.get('product_description', '').lower()
-        
-        for insight in qloo_insights:
-            insight_name = insight.get('name', '').lower()
-            if insight_name in title_lower or insight_name in description:
-                insight_score += 0.25
-        
-        score += min(insight_score, 0.6)  # Qloo insights contribute up to 60% of score
-        
-        aesthetic_keywords = cultural_context.get('aesthetic_keywords', [])
-        aesthetic_matches = sum(1 for keyword in aesthetic_keywords if keyword.lower() in title_lower)
-        score += min(aesthetic_matches * 0.1, 0.2)
-        
-        style_preferences = cultural_context.get('style_preferences', [])
-        style_matches = sum(1 for pref in style_preferences if pref.lower() in title_lower)
-        score += min(style_matches * 0.05, 0.1)
-        
-        mood_descriptors = cultural_context.get('mood_descriptors', [])
-        mood_matches = sum(1 for mood in mood_descriptors if mood.lower() in title_lower)
-        score += min(mood_matches * 0.05, 0.1)
-        
-        rating = product.get('rating', 0)
-        if rating > 4.5:
-            score += 0.05
-        elif rating > 4.0:
-            score += 0.03
-        
-        review_count = product.get('reviews', 0)
-        if review_count > 1000:
-            score += 0.02
-        elif review_count > 100:
-            score += 0.01
-        
-        if product.get('prime', False):
-            score += 0.02
-        
-        retail_price = product.get('retail_price', 0)
-        current_price = product.get('price', 0)
-        if retail_price > 0 and current_price > 0 and current_price < retail_price:
-            discount_ratio = (retail_price - current_price) / retail_price
-            score += min(discount_ratio * 0.05, 0.02)
-        
-        return min(score, 1.0)
+    def _group_search_keywords(self, keywords: List[str]) -> List[List[str]]:
+        """Split prioritized keywords into consecutive groups, one Amazon query each"""
+        group_size = max(1, settings.PRODUCT_SEARCH_GROUP_SIZE)
+        groups = [keywords[start:start + group_size] for start in range(0, len(keywords), group_size)]
+        return groups[:settings.PRODUCT_SEARCH_MAX_GROUPS]
     
     def get_product_categories_from_search(self, keywords: List[str]) -> List[str]:
         """Get product categories for Qloo-driven search keywords"""
@@ -451,11 +868,11 @@ class ProductService:
                 'withCache': 'true'
             }
             
-            response = requests.get(
+            response = http_client.get(
                 self.amazon_service.search_url,
+                endpoint='rapidapi.search',
                 headers=self.amazon_service.headers,
-                params=params,
-                timeout=10
+                params=params
             )
             
             if response.status_code == 200:
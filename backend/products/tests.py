@@ -0,0 +1,129 @@
+# products/tests.py
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from products.models import ProductSearch
+from products.scoring import CATEGORY_WEIGHTS, CulturalMatcher, score_products_batch, top_k_indices
+
+
+def score_product(product, cultural_context, product_mapping):
+    """Scores one product the way ranking did before it was vectorized; the oracle for the batch scorer"""
+    matches = CulturalMatcher(cultural_context, product_mapping).count_matches(product)
+
+    score = 0.0
+    for category, (weight, cap) in CATEGORY_WEIGHTS.items():
+        score += min(matches[category] * weight, cap)
+
+    rating = product.get('rating', 0)
+    if rating > 4.5:
+        score += 0.05
+    elif rating > 4.0:
+        score += 0.03
+
+    review_count = product.get('reviews', 0)
+    if review_count > 1000:
+        score += 0.02
+    elif review_count > 100:
+        score += 0.01
+
+    if product.get('prime', False):
+        score += 0.02
+
+    retail_price = product.get('retail_price', 0)
+    current_price = product.get('price', 0)
+    if retail_price > 0 and current_price > 0 and current_price < retail_price:
+        discount_ratio = (retail_price - current_price) / retail_price
+        score += min(discount_ratio * 0.05, 0.02)
+
+    return min(score, 1.0)
+
+
+WORDS = ['boho', 'vintage', 'linen', 'cozy', 'minimal', 'retro', 'denim', 'pastel', 'tote', 'lamp']
+
+
+class BatchScoringTests(SimpleTestCase):
+    """score_products_batch and top_k_indices rank exactly like scoring and sorting one product at a time"""
+
+    def setUp(self):
+        self.random = random.Random(16)
+
+    def random_product(self):
+        product = {
+            'title': " ".join(self.random.choices(WORDS, k=self.random.randint(0, 6))),
+            'product_description': " ".join(self.random.choices(WORDS, k=self.random.randint(0, 8))),
+            'rating': self.random.choice([0, 3.9, 4.0, 4.2, 4.5, 4.8]),
+            'reviews': self.random.choice([0, 50, 100, 101, 1000, 5000]),
+            'prime': self.random.random() < 0.5,
+            'retail_price': self.random.choice([0, 20, 49.99, 120]),
+            'price': self.random.choice([0, 15, 19.5, 49.99, 99]),
+        }
+        # Upstream results leave fields out; the scorers default them
+        for field in ('product_description', 'rating', 'reviews', 'prime', 'retail_price', 'price'):
+            if self.random.random() < 0.1:
+                del product[field]
+        return product
+
+    def random_context(self):
+        cultural_context = {
+            'aesthetic_keywords': self.random.sample(WORDS, 3),
+            'style_preferences': self.random.sample(WORDS, 2),
+            'mood_descriptors': self.random.sample(WORDS, 2),
+        }
+        product_mapping = {'cultural_insights': [{'name': name} for name in self.random.sample(WORDS, 3)]}
+        return cultural_context, product_mapping
+
+    def test_scores_match_per_product_scoring(self):
+        for _ in range(50):
+            cultural_context, product_mapping = self.random_context()
+            products = [self.random_product() for _ in range(40)]
+
+            scores = score_products_batch(products, cultural_context, product_mapping)
+            expected = [score_product(product, cultural_context, product_mapping) for product in products]
+            self.assertEqual(scores.tolist(), expected)
+
+    def test_top_k_matches_stable_sort(self):
+        for _ in range(50):
+            cultural_context, product_mapping = self.random_context()
+            products = [self.random_product() for _ in range(40)]
+            scores = score_products_batch(products, cultural_context, product_mapping)
+
+            expected = sorted(range(len(products)), key=lambda index: scores[index], reverse=True)
+            for k in (0, 1, 5, 39, 40, 60):
+                with self.subTest(k=k):
+                    self.assertEqual(top_k_indices(scores, k).tolist(), expected[:k])
+
+    def test_top_k_keeps_ties_in_input_order(self):
+        scores = score_products_batch([{'title': 'lamp'}] * 10, {}, {})
+        self.assertEqual(top_k_indices(scores, 4).tolist(), [0, 1, 2, 3])
+
+
+class SearchHistoryPaginationTests(TestCase):
+    """Search history pages walk every search once, newest first, across timestamp ties"""
+
+    def test_pages_cover_all_searches_in_order(self):
+        user = User.objects.create_user(username='history')
+        ProductSearch.objects.create(user=User.objects.create_user(username='other'), search_query='not mine')
+        searches = ProductSearch.objects.bulk_create([
+            ProductSearch(user=user, search_query=str(index)) for index in range(7)
+        ])
+        start = timezone.now()
+        for index, search in enumerate(searches):
+            ProductSearch.objects.filter(pk=search.pk).update(search_timestamp=start + timedelta(seconds=index // 3))
+        expected = list(ProductSearch.objects.filter(user=user).order_by('-search_timestamp', '-id')
+                        .values_list('id', flat=True))
+
+        client = APIClient()
+        client.force_authenticate(user)
+        url = '/api/products/history/?page_size=2'
+        seen = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(search['id'] for search in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, expected)
@@ -3,8 +3,10 @@ from rest_framework import status, generics
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .models import ProductSearch, ProductRecommendation
-from .serializers import ProductSearchSerializer, ProductRecommendationSerializer
+from fesoni import ratelimit
+from fesoni.pagination import KeysetPagination
+from .models import ProductSearch
+from .serializers import ProductSearchSerializer
 from .services import ProductService
 
 product_service = ProductService()
@@ -28,35 +30,18 @@ def search_products(request):
         # Search products using Qloo-driven insights
         products = product_service.search_products(cultural_context, qloo_data)
         
-        # Save search for analytics
-        search_obj = ProductSearch.objects.create(
-            user=request.user,
-            search_query=search_query,
-            cultural_context=cultural_context,
-            qloo_insights=qloo_data.get('cultural_insights', []),
-            cultural_trends=qloo_data.get('cultural_trends', [])
+        # Save search and recommendations with Qloo insights for analytics
+        search_obj = product_service.record_search(
+            request.user.id, search_query, cultural_context, qloo_data, products
         )
         
-        # Save recommendations with Qloo insights
-        for product in products:
-            ProductRecommendation.objects.create(
-                search=search_obj,
-                product_id=product['product_id'],
-                product_title=product['title'],
-                product_url=product['url'],
-                product_image=product.get('image'),
-                price=product.get('price'),
-                retailer=product['retailer'],
-                cultural_match_score=product['cultural_match_score'],
-                qloo_insights_applied=product.get('qloo_insights', [])
-            )
-        
         return Response({
             'success': True,
             'search_id': search_obj.id,
             'products': products,
             'qloo_insights': qloo_data.get('cultural_insights', []),
-            'cultural_trends': qloo_data.get('cultural_trends', [])
+            'cultural_trends': qloo_data.get('cultural_trends', []),
+            'degraded_services': ratelimit.degraded_providers()
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -65,10 +50,18 @@ def search_products(request):
             'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
 
+class ProductSearchCursorPagination(KeysetPagination):
+    """Newest-first pages of a user's searches"""
+    ordering = ('-search_timestamp', '-id')
+
 class ProductSearchHistoryView(generics.ListAPIView):
     """Retrieve user's product search history with Qloo-driven cultural insights"""
     serializer_class = ProductSearchSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ProductSearchCursorPagination
     
     def get_queryset(self):
-        return ProductSearch.objects.filter(user=self.request.user).order_by('-search_timestamp')
\ No newline at end of file
+        # Recommendations and their catalog products are fetched in one query each for the whole page
+        return ProductSearch.objects.filter(user=self.request.user).prefetch_related(
+            'recommendations__catalog_product'
+        )
\ No newline at end of file